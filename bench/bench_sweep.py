@@ -0,0 +1,104 @@
+"""
+Бенчмарк полной очистки (find_and_delete_plus_users_comments('all_posts')) против локального mock API.
+
+Пример: python -m bench.bench_sweep --posts 300 --comments 80 --latency-ms 40 --throttle-rate 0.02
+Печатает общее время, число запросов в секунду и p50/p99 задержки по каждому эндпоинту.
+"""
+import argparse
+import asyncio
+import logging
+import re
+import time
+from collections import defaultdict
+
+from src.dtf_api import DEFAULT_RATE_LIMITS, DtfClient, RateLimit, TokenManager, find_and_delete_plus_users_comments
+
+from . import mock_dtf_api
+
+def percentile(values: list[float], q: float) -> float:
+    """Перцентиль методом ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+def add_rate_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--read-rate", type=float, default=DEFAULT_RATE_LIMITS['read'].rate, help="Потолок темпа чтения, запр/с")
+    parser.add_argument("--write-rate", type=float, default=DEFAULT_RATE_LIMITS['write'].rate, help="Потолок темпа записи, запр/с")
+
+def rate_limits_from_arguments(args: argparse.Namespace) -> dict:
+    return {
+        'read': RateLimit(rate=args.read_rate, burst=int(args.read_rate) or 1, max_concurrency=DEFAULT_RATE_LIMITS['read'].max_concurrency),
+        'write': RateLimit(rate=args.write_rate, burst=int(args.write_rate) or 1, max_concurrency=DEFAULT_RATE_LIMITS['write'].max_concurrency),
+    }
+
+class TimedDtfClient(DtfClient):
+    """DtfClient, который запоминает длительность каждого логического запроса (с учетом ожидания лимитов и повторов)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+
+    async def request(self, method, url, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().request(method, url, *args, **kwargs)
+        finally:
+            path = re.sub(r"/\d+", "/{id}", url)
+            self.latencies[f"{method} {path}"].append(time.perf_counter() - started)
+
+def print_report(wall_time: float, client: TimedDtfClient, api: mock_dtf_api.MockDtfApi, result) -> None:
+    total_requests = sum(len(values) for values in client.latencies.values())
+    print()
+    print(f"Время очистки:        {wall_time:.2f} с")
+    print(f"Запросов:             {total_requests} ({total_requests / wall_time:.1f} запр/с)")
+    print(f"Удалено / ошибок:     {result.deleted} / {result.failed}, постов с ошибками: {len(result.failed_posts)}")
+    print(f"Осталось Plus-комм.:  {api.remaining_plus_comments()}")
+    print()
+    print(f"{'Эндпоинт':<32}{'N':>8}{'p50, мс':>12}{'p99, мс':>12}")
+    for endpoint, values in sorted(client.latencies.items()):
+        print(f"{endpoint:<32}{len(values):>8}{percentile(values, 50) * 1000:>12.1f}{percentile(values, 99) * 1000:>12.1f}")
+    statuses = defaultdict(int)
+    for (_, _, status), count in api.requests.items():
+        statuses[status] += count
+    print()
+    print("Ответы сервера по статусам: " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+
+async def run(args: argparse.Namespace) -> None:
+    api = mock_dtf_api.from_arguments(args)
+    runner, base_url = await api.start()
+    client = TimedDtfClient(base_url=base_url, http2=False, max_concurrent_requests=args.max_requests, rate_limits=rate_limits_from_arguments(args))
+    try:
+        token_manager = TokenManager(client=client, cache_file=None)
+        token_manager.refresh_token = api.refresh_token
+
+        started = time.perf_counter()
+        result = await find_and_delete_plus_users_comments(
+            'all_posts', None, api.user["id"], token_manager,
+            max_concurrent_posts=args.max_posts,
+            reply=not args.delete_only,
+        )
+        wall_time = time.perf_counter() - started
+    finally:
+        await client.aclose()
+        await runner.cleanup()
+    print_report(wall_time, client, api, result)
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк очистки всех постов на mock API")
+    mock_dtf_api.add_arguments(parser)
+    parser.add_argument("--max-posts", type=int, default=4, help="Постов в обработке одновременно")
+    parser.add_argument("--max-requests", type=int, default=10, help="HTTP-запросов одновременно")
+    add_rate_arguments(parser)
+    parser.add_argument("--delete-only", action="store_true", help="Не отвечать перед удалением")
+    parser.add_argument("--verbose", action="store_true", help="Не приглушать логи src.*")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger("src").setLevel(logging.WARNING)
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Нагрузочный бенчмарк WebSocketWatcher: время от события упоминания до удаления Plus-комментария.
+
+Пример: python -m bench.bench_watcher --events 500 --rate 50 --burst 10 --hot-posts 5
+Поднимает mock REST API и mock socket.io-сервер, подключает к ним настоящий WebSocketWatcher
+и рассылает упоминания пачками. В конце печатает распределение задержки event -> delete,
+а также пропущенные (не удаленные) и повторно обработанные комментарии.
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from src.auto_service import WebSocketWatcher
+from src.dtf_api import DtfClient, TokenManager
+
+from . import mock_dtf_api
+from .bench_sweep import add_rate_arguments, percentile, rate_limits_from_arguments
+from .mock_dtf_ws import MockDtfSocket
+
+async def run(args: argparse.Namespace) -> None:
+    api = mock_dtf_api.from_arguments(args)
+    api_runner, api_url = await api.start()
+    ws = MockDtfSocket(api)
+    ws_runner, ws_url = await ws.start()
+    client = DtfClient(base_url=api_url, http2=False, rate_limits=rate_limits_from_arguments(args))
+    token_manager = TokenManager(client=client, cache_file=None)
+    token_manager.refresh_token = api.refresh_token
+    watcher = WebSocketWatcher(
+        token_manager, api.user["userHash"],
+        workers=args.workers, queue_size=args.queue_size, coalesce_window=args.coalesce_window,
+        websocket_url=ws_url,
+    )
+    watcher_task = asyncio.create_task(watcher.start())
+    try:
+        await asyncio.wait_for(ws.subscribed.wait(), timeout=10)
+
+        post_ids = list(api.posts)[:args.hot_posts] if args.hot_posts else list(api.posts)
+        interval = args.burst / args.rate
+        started = time.perf_counter()
+        for sent in range(0, args.events, args.burst):
+            for _ in range(min(args.burst, args.events - sent)):
+                await ws.emit_mention(api.rng.choice(post_ids), is_plus=api.rng.random() < args.event_plus_ratio)
+            await asyncio.sleep(interval)
+        send_time = time.perf_counter() - started
+
+        # Ждем, пока все Plus-комментарии будут удалены или истечет время на дообработку
+        deadline = time.monotonic() + args.drain_timeout
+        while time.monotonic() < deadline and not ws.plus_comment_ids <= api.deleted_at.keys():
+            await asyncio.sleep(0.1)
+    finally:
+        await watcher.sio.disconnect()
+        watcher_task.cancel()
+        await asyncio.gather(watcher_task, return_exceptions=True)
+        await client.aclose()
+        await ws_runner.cleanup()
+        await api_runner.cleanup()
+
+    latencies = [api.deleted_at[cid] - ws.sent_at[cid] for cid in ws.plus_comment_ids if cid in api.deleted_at]
+    missed = len(ws.plus_comment_ids) - len(latencies)
+    duplicated = sum(1 for cid in ws.sent_at if api.delete_attempts[cid] > 1)
+    wrongly_deleted = sum(1 for cid in ws.sent_at if cid in api.deleted_at and cid not in ws.plus_comment_ids)
+
+    print()
+    print(f"Отправлено событий:   {len(ws.sent_at)} за {send_time:.2f} с ({len(ws.sent_at) / send_time:.1f} соб/с)")
+    print(f"Plus-комментариев:    {len(ws.plus_comment_ids)}, удалено: {len(latencies)}, пропущено: {missed}")
+    print(f"Повторные удаления:   {duplicated}, удалено по ошибке: {wrongly_deleted}")
+    print(f"Watcher:              получено {watcher.events_received}, объединено {watcher.events_coalesced}, отброшено {watcher.events_dropped}")
+    if latencies:
+        print(f"Событие -> удаление:  p50 {percentile(latencies, 50) * 1000:.0f} мс, p90 {percentile(latencies, 90) * 1000:.0f} мс, "
+              f"p99 {percentile(latencies, 99) * 1000:.0f} мс, max {max(latencies) * 1000:.0f} мс")
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный бенчмарк WebSocketWatcher на mock-серверах")
+    mock_dtf_api.add_arguments(parser)
+    parser.set_defaults(posts=20, comments=20)
+    parser.add_argument("--events", type=int, default=200, help="Всего событий упоминания")
+    parser.add_argument("--rate", type=float, default=20.0, help="Средний темп событий, соб/с")
+    parser.add_argument("--burst", type=int, default=5, help="Событий в одной пачке")
+    parser.add_argument("--hot-posts", type=int, default=0, help="Слать события только в N первых постов (0 - во все)")
+    parser.add_argument("--event-plus-ratio", type=float, default=0.5, help="Доля событий о комментариях Plus-пользователей")
+    add_rate_arguments(parser)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=500)
+    parser.add_argument("--coalesce-window", type=float, default=2.0)
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="Сколько ждать дообработки после последнего события, с")
+    parser.add_argument("--verbose", action="store_true", help="Не приглушать логи")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        for name in ("src", "httpx", "socketio", "engineio"):
+            logging.getLogger(name).setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
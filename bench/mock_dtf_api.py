@@ -0,0 +1,256 @@
+"""
+Локальный заменитель api.dtf.ru для замеров производительности без обращения к настоящему сайту.
+
+Реализует только те эндпоинты, которыми пользуется src/dtf_api.py, поверх синтетического аккаунта
+с настраиваемым числом постов и комментариев, долей Plus-авторов, задержкой ответа и инъекцией ошибок/429.
+
+Запуск отдельно: python -m bench.mock_dtf_api --posts 200 --comments 100 --port 8080
+"""
+import argparse
+import asyncio
+import base64
+import json
+import random
+import time
+from collections import Counter
+
+from aiohttp import web
+
+def _make_jwt(exp: float) -> str:
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+    return f"{encode({'alg': 'none'})}.{encode({'exp': int(exp)})}.mock"
+
+class MockDtfApi:
+    """Состояние синтетического аккаунта и aiohttp-приложение, отвечающее как API DTF."""
+
+    def __init__(
+        self,
+        posts: int = 100,
+        comments_per_post: int = 50,
+        plus_ratio: float = 0.1,
+        latency_ms: float = 20.0,
+        jitter_ms: float = 10.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: float = 1.0,
+        timeline_page_size: int = 20,
+        comments_page_size: int = 50,
+        token_ttl: float = 3600.0,
+        seed: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.timeline_page_size = timeline_page_size
+        self.comments_page_size = comments_page_size
+        self.token_ttl = token_ttl
+        self.rng = random.Random(seed)
+
+        self.user = {"id": 1, "name": "bench", "userHash": "bench-user-hash", "mHash": "bench-m-hash"}
+        self.refresh_token = "mock-refresh-0"
+        self.access_token = _make_jwt(time.time() + token_ttl)
+
+        self.posts: dict[int, dict] = {}
+        self.comments: dict[int, dict[int, dict]] = {}  # post_id -> {comment_id: comment}, ID по возрастанию
+        self.comment_post: dict[int, int] = {}  # comment_id -> post_id
+        self._next_comment_id = 1
+        self.requests: Counter = Counter()  # (метод, маршрут, статус) -> число запросов
+        self.deleted_plus = 0
+        self.deleted_regular = 0
+        self.delete_attempts: Counter = Counter()  # comment_id -> число запросов на удаление
+        self.deleted_at: dict[int, float] = {}  # comment_id -> time.monotonic() успешного удаления
+        self.replies = 0
+
+        now = int(time.time())
+        for index in range(posts):
+            post_id = 100_000 + index
+            self.posts[post_id] = {"id": post_id, "title": f"Пост №{index}", "date": now - (posts - index) * 3600}
+            self.comments[post_id] = {}
+            for _ in range(comments_per_post):
+                self.add_comment(post_id, is_plus=self.rng.random() < plus_ratio)
+
+    def add_comment(self, post_id: int, is_plus: bool, author_name: str | None = None, reply_to: int = 0) -> dict:
+        """Добавляет комментарий (так же его используют генераторы нагрузки для WebSocket)."""
+        comment_id = self._next_comment_id
+        self._next_comment_id += 1
+        author_id = self.rng.randint(2, 10_000)
+        comment = {
+            "id": comment_id,
+            "date": int(time.time()),
+            "replyTo": reply_to,
+            "text": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 3,
+            "author": {
+                "id": author_id,
+                "name": author_name or f"user{author_id}",
+                "isPlus": is_plus,
+                "avatar": {"type": "image", "data": {"uuid": f"avatar-{author_id}", "width": 400, "height": 400}},
+            },
+            "media": [],
+            "likes": {"counter": self.rng.randint(0, 50), "isLiked": 0},
+            "isEdited": False,
+        }
+        self.comments[post_id][comment_id] = comment
+        self.comment_post[comment_id] = post_id
+        return comment
+
+    def remaining_plus_comments(self) -> int:
+        return sum(1 for comments in self.comments.values() for c in comments.values() if c["author"]["isPlus"])
+
+    # --- aiohttp ---
+
+    def make_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post("/v3.4/auth/refresh", self.auth_refresh)
+        app.router.add_post("/v3.4/auth/email/login", self.auth_login)
+        app.router.add_get("/v2.31/subsite/me", self.subsite_me)
+        app.router.add_get("/v2.8/timeline", self.timeline)
+        app.router.add_get("/v2.9/comments", self.post_comments)
+        app.router.add_post("/v2.4/comment/add", self.comment_add)
+        app.router.add_get("/v3.0/comments/{comment_id}", self.comment_get)
+        app.router.add_delete("/v3.0/comments/{comment_id}", self.comment_delete)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> tuple[web.AppRunner, str]:
+        """Запускает сервер в текущем event loop. Возвращает runner (для cleanup) и базовый URL."""
+        runner = web.AppRunner(self.make_app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return runner, f"http://{host}:{bound_port}"
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        response = await self._handle(request, handler)
+        self.requests[(request.method, route, response.status)] += 1
+        return response
+
+    async def _handle(self, request: web.Request, handler):
+        delay = max(0.0, self.rng.gauss(self.latency_ms, self.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        if self.rng.random() < self.throttle_rate:
+            return web.json_response({"message": "Too Many Requests"}, status=429, headers={"Retry-After": str(self.retry_after)})
+        if self.rng.random() < self.error_rate:
+            return web.json_response({"message": "Service Unavailable"}, status=503)
+        if not request.path.startswith("/v3.4/auth/"):
+            if request.headers.get("jwtauthorization") != f"Bearer {self.access_token}":
+                return web.json_response({"message": "Unauthorized"}, status=401)
+        return await handler(request)
+
+    async def auth_refresh(self, request: web.Request):
+        form = await request.post()
+        if form.get("token") != self.refresh_token:
+            return web.json_response({"message": "Invalid refresh token"}, status=400)
+        return web.json_response({"data": self._rotate_tokens()})
+
+    async def auth_login(self, request: web.Request):
+        return web.json_response({"data": self._rotate_tokens()})
+
+    def _rotate_tokens(self) -> dict:
+        serial = int(self.refresh_token.rsplit("-", 1)[1]) + 1
+        self.refresh_token = f"mock-refresh-{serial}"
+        self.access_token = _make_jwt(time.time() + self.token_ttl)
+        return {"accessToken": self.access_token, "refreshToken": self.refresh_token}
+
+    async def subsite_me(self, request: web.Request):
+        return web.json_response({"result": self.user})
+
+    async def timeline(self, request: web.Request):
+        last_id = int(request.query.get("lastId") or 0)
+        post_ids = sorted(self.posts, reverse=True)  # sorting=new
+        if last_id:
+            post_ids = [post_id for post_id in post_ids if post_id < last_id]
+        page = post_ids[:self.timeline_page_size]
+        items = [
+            {"type": "entry", "data": {**self.posts[post_id], "counters": {"comments": len(self.comments[post_id])}}}
+            for post_id in page
+        ]
+        return web.json_response({"result": {
+            "items": items,
+            "lastId": page[-1] if page else None,
+            "lastSortingValue": self.posts[page[-1]]["date"] if page else None,
+        }})
+
+    async def post_comments(self, request: web.Request):
+        post_id = int(request.query["contentId"])
+        last_id = int(request.query.get("lastId") or 0)
+        page = []
+        for comment_id, comment in self.comments.get(post_id, {}).items():
+            if comment_id > last_id:
+                page.append(comment)
+                if len(page) == self.comments_page_size:
+                    break
+        return web.json_response({"result": {"items": page, "lastId": page[-1]["id"] if page else None}})
+
+    async def comment_add(self, request: web.Request):
+        form = await request.post()
+        post_id = int(form["id"])
+        if post_id not in self.comments:
+            return web.json_response({"message": "Entry not found"}, status=404)
+        comment = self.add_comment(post_id, is_plus=False, author_name=self.user["name"], reply_to=int(form.get("reply_to") or 0))
+        self.replies += 1
+        return web.json_response({"result": {"id": comment["id"]}})
+
+    async def comment_get(self, request: web.Request):
+        comment_id = int(request.match_info["comment_id"])
+        post_id = self.comment_post.get(comment_id)
+        if post_id is None or comment_id not in self.comments[post_id]:
+            return web.json_response({"message": "Comment not found"}, status=404)
+        return web.json_response({"result": self.comments[post_id][comment_id]})
+
+    async def comment_delete(self, request: web.Request):
+        comment_id = int(request.match_info["comment_id"])
+        self.delete_attempts[comment_id] += 1
+        post_id = self.comment_post.get(comment_id)
+        comment = self.comments[post_id].pop(comment_id, None) if post_id is not None else None
+        if comment is None:
+            return web.json_response({"message": "Comment not found"}, status=404)
+        self.deleted_at[comment_id] = time.monotonic()
+        if comment["author"]["isPlus"]:
+            self.deleted_plus += 1
+        else:
+            self.deleted_regular += 1
+        return web.json_response({"result": True})
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Общие параметры синтетического аккаунта (используются и бенчмарками)."""
+    parser.add_argument("--posts", type=int, default=100, help="Число постов в аккаунте")
+    parser.add_argument("--comments", type=int, default=50, help="Комментариев на пост")
+    parser.add_argument("--plus-ratio", type=float, default=0.1, help="Доля комментариев от Plus-пользователей")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Средняя задержка ответа, мс")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Разброс задержки, мс")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Доля ответов 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Значение Retry-After для 429, с")
+    parser.add_argument("--seed", type=int, default=0)
+
+def from_arguments(args: argparse.Namespace) -> MockDtfApi:
+    return MockDtfApi(
+        posts=args.posts,
+        comments_per_post=args.comments,
+        plus_ratio=args.plus_ratio,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный mock API DTF")
+    add_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    api = from_arguments(args)
+    print(f"refreshToken для входа: {api.refresh_token}")
+    web.run_app(api.make_app(), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Локальный заменитель ws-sio.dtf.ru (python-socketio) для нагрузочных замеров WebSocketWatcher.
+
+Принимает подписку "subscribe" на канал mobile:{userHash} и рассылает в него события упоминаний (type 8)
+в том же формате, что и настоящий сервер. Комментарии для событий создаются в связанном MockDtfApi.
+"""
+import asyncio
+import time
+
+import socketio
+from aiohttp import web
+
+from .mock_dtf_api import MockDtfApi
+
+class _GatherManager(socketio.AsyncManager):
+    """
+    AsyncManager из python-socketio 4.x передает в asyncio.wait корутины, что запрещено начиная с Python 3.11.
+    Рассылаем так же, но через asyncio.gather.
+    """
+
+    async def emit(self, event, data, namespace, room=None, skip_sid=None, callback=None, **kwargs):
+        if namespace not in self.rooms or room not in self.rooms[namespace]:
+            return
+        if not isinstance(skip_sid, list):
+            skip_sid = [skip_sid]
+        sends = []
+        for sid in self.get_participants(namespace, room):
+            if sid not in skip_sid:
+                ack_id = self._generate_ack_id(sid, namespace, callback) if callback is not None else None
+                sends.append(self.server._emit_internal(sid, event, data, namespace, ack_id))
+        await asyncio.gather(*sends)
+
+class MockDtfSocket:
+    """socket.io-сервер, генерирующий упоминания и запоминающий время их отправки."""
+
+    def __init__(self, api: MockDtfApi):
+        self.api = api
+        self.sio = socketio.AsyncServer(async_mode="aiohttp", client_manager=_GatherManager())
+        self.subscribed = asyncio.Event()
+        self.sent_at: dict[int, float] = {}  # comment_id -> time.monotonic() отправки события
+        self.plus_comment_ids: set[int] = set()
+        self._setup_events()
+
+    def _setup_events(self):
+        @self.sio.on("subscribe")
+        async def subscribe(sid, data):
+            self.sio.enter_room(sid, data.get("channel"))
+            self.subscribed.set()
+            return {"status": "ok"}
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> tuple[web.AppRunner, str]:
+        """Запускает сервер в текущем event loop. Возвращает runner (для cleanup) и URL для подключения."""
+        app = web.Application()
+        self.sio.attach(app)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return runner, f"http://{host}:{bound_port}"
+
+    async def emit_mention(self, post_id: int, is_plus: bool) -> int:
+        """Создает комментарий в посте и отправляет событие упоминания о нем. Возвращает ID комментария."""
+        comment = self.api.add_comment(post_id, is_plus=is_plus)
+        comment_id = comment["id"]
+        if is_plus:
+            self.plus_comment_ids.add(comment_id)
+        self.sent_at[comment_id] = time.monotonic()
+        payload = {"data": {"type": 8, "data": {"entryId": post_id, "commentId": comment_id}}}
+        await self.sio.emit("event", payload, room=f"mobile:{self.api.user['userHash']}")
+        return comment_id
@@ -1,6 +1,6 @@
-with open("find_me_in_system.txt", "w") as f:
-    f.write("This file is created to ensure the script runs correctly.")
-    
+import time
+_process_started = time.perf_counter()  # Для --profile-startup: отсчет до импорта всего остального
+
 import sys
 import os
 import asyncio
@@ -25,15 +25,23 @@ if getattr(sys, 'frozen', False):
     base_path = sys._MEIPASS
     sys.path.append(base_path)
 
-# Теперь импортируем только то, что нужно для запуска
-from src.auto_service import main_async
+# Теперь импортируем только то, что нужно для запуска (socketio импортируется позже, параллельно с запросами к API)
+_import_started = time.perf_counter()
+from src.auto_service import parse_args, run_from_args
+from src.startup_profile import StartupProfile
+_import_finished = time.perf_counter()
 
 # --- НОВЫЙ БЛОК ЗАПУСКА ---
 # Этот код будет выполняться, когда Task Scheduler запустит .exe
 if __name__ == '__main__':
     try:
         # Просто запускаем основную асинхронную функцию
-        asyncio.run(main_async())
+        args = parse_args()
+        profile = None
+        if args.profile_startup:
+            profile = StartupProfile(started_at=_process_started)
+            profile.add("import src.auto_service", _import_started, _import_finished)
+        asyncio.run(run_from_args(args, profile))
     except KeyboardInterrupt:
         # Это полезно для отладки из командной строки
         print("Процесс прерван пользователем.")
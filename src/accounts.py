@@ -0,0 +1,45 @@
+import logging
+import os
+import re
+from dataclasses import dataclass
+
+from .dtf_api import DEFAULT_ACCOUNT, TOKEN_CACHE_FILE
+from .profile_cache import PROFILE_CACHE_FILE
+
+logger = logging.getLogger(__name__)
+
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".antidtfplus")
+ACCOUNTS_DIR = os.path.join(APP_DATA_DIR, "accounts")
+
+_ACCOUNT_NAME = re.compile(r"^[\w.-]+$")  # Имя аккаунта - это имя папки
+
+@dataclass(frozen=True)
+class Account:
+    """Аккаунт DTF, за которым следит служба: свои файлы кэша токенов и профиля."""
+    name: str
+    token_cache_file: str
+    profile_cache_file: str
+
+def get_account(name: str) -> Account:
+    """
+    Аккаунт по имени. DEFAULT_ACCOUNT - это аккаунт GUI (token_cache.json и profile_cache.json в корне
+    папки приложения), остальные хранятся в accounts/<имя>/.
+    """
+    if name == DEFAULT_ACCOUNT:
+        return Account(name, TOKEN_CACHE_FILE, PROFILE_CACHE_FILE)
+    if not _ACCOUNT_NAME.match(name):
+        raise ValueError(f"Недопустимое имя аккаунта: {name!r} (разрешены буквы, цифры, '.', '-' и '_').")
+    account_dir = os.path.join(ACCOUNTS_DIR, name)
+    return Account(name, os.path.join(account_dir, "token_cache.json"), os.path.join(account_dir, "profile_cache.json"))
+
+def list_accounts() -> list[Account]:
+    """Все аккаунты, для которых есть кэш токенов: сначала аккаунт GUI, затем остальные по имени."""
+    names = [DEFAULT_ACCOUNT] if os.path.exists(TOKEN_CACHE_FILE) else []
+    try:
+        entries = sorted(os.listdir(ACCOUNTS_DIR))
+    except FileNotFoundError:
+        entries = []
+    for name in entries:
+        if name != DEFAULT_ACCOUNT and _ACCOUNT_NAME.match(name) and os.path.exists(os.path.join(ACCOUNTS_DIR, name, "token_cache.json")):
+            names.append(name)
+    return [get_account(name) for name in names]
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+
+from . import metrics
+from .dtf_api import TokenManager, sweep_active_posts
+from .scan_index import ScanIndex
+
+logger = logging.getLogger(__name__)
+
+POLL_MIN_INTERVAL = 30.0  # Пока в постах появляются комментарии, опрашиваем ленту так часто
+POLL_MAX_INTERVAL = 600.0  # В тишине интервал растет до этого значения
+POLL_HOT_PAGES = 1  # Обычный опрос смотрит только самые новые посты: комментарии приходят в основном туда
+POLL_FULL_EVERY = 10  # Каждый такой опрос просматривает всю ленту, чтобы не пропустить старые посты
+
+class ActivityPoller:
+    """
+    Дополняет WebSocketWatcher: сервер присылает события только об упоминаниях, а Plus-комментарии без
+    упоминаний ловит этот опрос ленты. По счетчикам комментариев в /timeline находятся посты, где
+    комментарии изменились с прошлого опроса, и проверяются только они (sweep_active_posts).
+    Интервал адаптивный: при найденной активности он сокращается (speedup), без нее - растет (slowdown).
+    """
+
+    def __init__(
+        self,
+        token_manager: TokenManager,
+        subsite_id: int,
+        scan_index: ScanIndex,
+        min_interval: float = POLL_MIN_INTERVAL,
+        max_interval: float = POLL_MAX_INTERVAL,
+        hot_pages: int = POLL_HOT_PAGES,
+        full_every: int = POLL_FULL_EVERY,
+        speedup: float = 0.5,
+        slowdown: float = 1.5,
+    ):
+        self.token_manager = token_manager
+        self.account = token_manager.account
+        self.subsite_id = subsite_id
+        self.scan_index = scan_index
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.hot_pages = hot_pages
+        self.full_every = full_every
+        self.speedup = speedup
+        self.slowdown = slowdown
+        self.interval = min_interval
+        self.polls = 0
+        self._last_poll_started = time.time()
+        metrics.POLLER_INTERVAL.set_function(lambda: self.interval, account=self.account)
+
+    async def poll_once(self) -> int:
+        """Один опрос ленты. Возвращает число постов, в которых изменились комментарии."""
+        self.polls += 1
+        full = self.polls % self.full_every == 0
+        started = time.time()
+        # Новые посты, которых еще нет в индексе, проверяем, если они вышли после прошлого опроса
+        since, self._last_poll_started = self._last_poll_started, started
+        result = await sweep_active_posts(self.subsite_id, self.token_manager, self.scan_index, since, max_pages=None if full else self.hot_pages)
+        metrics.POLLER_POLLS.inc(account=self.account, mode='full' if full else 'hot')
+        if result.posts:
+            logger.info(f"🔎 Опрос ленты ({'вся лента' if full else 'новые посты'}): постов с новыми комментариями {len(result.posts)}, "
+                        f"удалено {result.deleted}, ошибок {result.failed}, за {time.time() - started:.1f} с.")
+        return len(result.posts)
+
+    def _next_interval(self, active_posts: int) -> float:
+        if active_posts:
+            return max(self.min_interval, self.interval * self.speedup)
+        return min(self.max_interval, self.interval * self.slowdown)
+
+    async def run(self):
+        """
+        Опрашивает ленту до отмены задачи; ошибка одного опроса не останавливает следующие.
+        Первый опрос - через min_interval: сразу после подключения ленту проверяет догоняющая проверка watcher.
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                active_posts = await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка опроса ленты: {e}", exc_info=True)
+                active_posts = 0
+            self.interval = self._next_interval(active_posts)
+            logger.debug(f"Следующий опрос ленты через {self.interval:.0f} с.")
@@ -1,20 +1,35 @@
 import tkinter as tk
 from tkinter import font as tkfont
-import asyncio
+from tkinter import messagebox
+import concurrent.futures
+import logging
 
 from .windows.auth_window import AuthWindow
 from .windows.main_menu import MainMenu
 from .windows.post_selection_menu import PostSelectionMenu
-from .dtf_api import TokenManager, get_user_info
+from .async_loop import AsyncLoopThread
+from .dtf_api import DtfClient, TokenManager, get_user_info
+from .job_scheduler import JobScheduler
+from .profile_cache import save_profile
+from .scan_index import ScanIndex
+from .sweep_journal import SweepJournal
+
+logger = logging.getLogger(__name__)
 
 class App(tk.Tk):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        
+
         self.title("AntiDTFPlus")
         self.title_font = tkfont.Font(family='Helvetica', size=18, weight="bold")
-        
-        self.token_manager = TokenManager()
+
+        # Один event loop и один пул соединений на всё приложение
+        self.async_loop = AsyncLoopThread().start()
+        self.dtf_client = DtfClient()
+        self.token_manager = TokenManager(client=self.dtf_client)
+        self.scan_index = ScanIndex()
+        self.sweep_journal = SweepJournal()
+        self.job_scheduler = JobScheduler(self.token_manager, self.scan_index)  # Очистка выбранных постов в фоне
         self.user_id = None
         self.user_name = None
 
@@ -30,33 +45,79 @@ class App(tk.Tk):
             self.frames[page_name] = frame
             frame.grid(row=0, column=0, sticky="nsew")
 
-        # Запускаем асинхронную проверку входа
-        asyncio.run(self.try_auto_login())
+        # Пока идет автоматический вход, поверх остальных окон висит заглушка
+        loading_frame = tk.Frame(container)
+        tk.Label(loading_frame, text="Вход в аккаунт...", font=self.title_font).pack(expand=True)
+        loading_frame.grid(row=0, column=0, sticky="nsew")
 
-    async def try_auto_login(self):
-        """Пытается войти, используя сохраненные токены."""
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Окно показывается сразу, вход проверяется в фоне
         if self.token_manager.refresh_token:
-            # Если токен обновления есть (после обновления или он был валиден), получаем данные пользователя
-            user_data = await get_user_info(self.token_manager)
-            if user_data and 'id' in user_data:
-                self.user_id = user_data['id']
-                self.user_name = user_data.get('name', 'Неизвестный пользователь')
-                print(f"Автоматический вход успешен. User ID: {self.user_id}")
-                self.show_frame("MainMenu")
+            self.run_async(self.try_auto_login(), self._on_auto_login)
+        else:
+            self.show_frame("AuthWindow")
+
+    def run_async(self, coro, callback=None, error_callback=None) -> concurrent.futures.Future:
+        """
+        Выполняет корутину в общем фоновом event loop.
+        callback(result) или error_callback(exception) вызываются в потоке Tk через after().
+        """
+        future = self.async_loop.submit(coro)
+
+        def on_done(done: concurrent.futures.Future):
+            if done.cancelled():
                 return
+            error = done.exception()
+            try:
+                if error is not None:
+                    self.after(0, error_callback or self._show_async_error, error)
+                elif callback is not None:
+                    self.after(0, callback, done.result())
+            except (RuntimeError, tk.TclError):
+                pass  # Окно уже закрыто
+
+        future.add_done_callback(on_done)
+        return future
+
+    def _show_async_error(self, error: BaseException):
+        logger.error("❌ Ошибка фоновой операции: %s", error, exc_info=error)
+        messagebox.showerror("Ошибка", f"Произошла непредвиденная ошибка:\n{error}")
+
+    async def try_auto_login(self):
+        """Пытается войти, используя сохраненные токены. Возвращает данные пользователя или None."""
+        # Если токен обновления есть (после обновления или он был валиден), получаем данные пользователя
+        user_data = await get_user_info(self.token_manager)
+        if user_data and 'id' in user_data:
+            return user_data
+        return None
+
+    def _on_auto_login(self, user_data):
+        if user_data:
+            self.user_id = user_data['id']
+            self.user_name = user_data.get('name', 'Неизвестный пользователь')
+            save_profile(user_data)
+            print(f"Автоматический вход успешен. User ID: {self.user_id}")
+            self.show_frame("MainMenu")
+            return
 
         # Если автоматический вход не удался, показываем окно аутентификации
         print("Автоматический вход не удался. Показываю окно входа.")
         self.show_frame("AuthWindow")
 
-
     def show_frame(self, page_name):
         '''Показать окно по его имени'''
         frame = self.frames[page_name]
         # Генерируем событие, чтобы окно знало, что его сейчас покажут
-        frame.event_generate("<<ShowFrame>>") 
+        frame.event_generate("<<ShowFrame>>")
         frame.tkraise()
 
+    def on_close(self):
+        """Закрывает HTTP-клиент в его event loop, останавливает loop и закрывает окно."""
+        self.async_loop.stop(cleanup=self.dtf_client.aclose())
+        self.scan_index.close()
+        self.destroy()
+
 if __name__ == "__main__":
     app = App()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
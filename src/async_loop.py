@@ -0,0 +1,51 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Coroutine
+
+logger = logging.getLogger(__name__)
+
+class AsyncLoopThread:
+    """
+    Один долгоживущий event loop в фоновом потоке.
+    GUI отправляет в него корутины через submit(), поэтому пул соединений DtfClient,
+    ограничители темпа и состояние TokenManager живут между действиями пользователя.
+    """
+
+    def __init__(self, name: str = "asyncio-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        # Доделываем то, что осталось после остановки, чтобы не было предупреждений о брошенных задачах
+        pending = asyncio.all_tasks(self.loop)
+        for task in pending:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        self.loop.close()
+
+    def start(self) -> "AsyncLoopThread":
+        self._thread.start()
+        return self
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Запускает корутину в фоновом loop. Потокобезопасно."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, cleanup: Coroutine | None = None, timeout: float = 5.0):
+        """Выполняет cleanup (например, закрытие HTTP-клиента), затем останавливает loop и ждет поток."""
+        if not self._thread.is_alive():
+            if cleanup is not None:
+                cleanup.close()
+            return
+        if cleanup is not None:
+            try:
+                self.submit(cleanup).result(timeout=timeout)
+            except Exception as e:
+                logger.warning(f"⚠️ Ошибка при завершении фоновых задач: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=timeout)
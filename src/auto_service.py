@@ -1,31 +1,117 @@
+import argparse
 import asyncio
+import contextlib
+import getpass
+import importlib
 import logging
-import socketio
 import os
+import random
 import sys
+import time
 
-from .dtf_api import TokenManager, get_user_info, find_and_delete_plus_users_comments
-from .log_config import setup_logging
+import httpx
+
+from . import metrics
+from .accounts import Account, get_account, list_accounts
+from .activity_poller import ActivityPoller
+from .dtf_api import DtfClient, TokenManager, get_user_info, sweep_active_posts, find_and_delete_plus_users_comments, handle_single_comment
+from .log_config import current_account, setup_logging
+from .profile_cache import load_profile, save_profile
+from .scan_index import ScanIndex
+from .startup_profile import StartupProfile
 
 # Настраиваем логирование один раз при импорте модуля
 setup_logging()
 logger = logging.getLogger(__name__)
 
+WATERMARK_SAVE_INTERVAL = 5.0  # Отметку последнего полученного события сохраняем на диск не чаще раза в столько секунд
+
+class ReconnectBackoff:
+    """
+    Задержки переподключения: первая попытка почти сразу (короткий сбой сети), дальше экспоненциальный рост
+    до max_delay. Половина задержки случайна, чтобы несколько аккаунтов и процессов не переподключались разом.
+    """
+
+    def __init__(self, first_delay: float = 1.0, max_delay: float = 60.0, factor: float = 2.0, reset_after: float = 30.0):
+        self.first_delay = first_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.reset_after = reset_after  # Соединение, продержавшееся столько секунд, сбрасывает рост задержки
+        self.attempt = 0
+
+    def next_delay(self) -> float:
+        delay = min(self.max_delay, self.first_delay * self.factor ** self.attempt)
+        self.attempt += 1
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def reset(self) -> None:
+        self.attempt = 0
+
 class WebSocketWatcher:
     """
-    Класс для управления WebSocket соединением. Код остается без изменений.
+    Класс для управления WebSocket соединением.
+    Обработчик событий только кладет упоминания в ограниченную очередь; HTTP-работу выполняет пул воркеров.
+    События одного поста, пришедшие в пределах coalesce_window секунд, объединяются в одну задачу.
+    После каждого (пере)подключения запускается догоняющая проверка (sweep_active_posts) постов, в которых появились
+    комментарии, пока сокет был отключен: упоминания за это время сервер не пересылает.
     """
     DTF_WEBSOCKET_URL = "https://ws-sio.dtf.ru"
 
-    def __init__(self, token_manager: TokenManager, user_hash: str):
+    def __init__(
+        self,
+        token_manager: TokenManager,
+        user_hash: str,
+        scan_index: ScanIndex | None = None,
+        workers: int = 4,
+        queue_size: int = 500,
+        coalesce_window: float = 2.0,
+        rescan_threshold: int = 3,
+        websocket_url: str = DTF_WEBSOCKET_URL,
+        subsite_id: int | None = None,
+    ):
+        """:param subsite_id: ID пользователя для догоняющей проверки его постов; без него (или без scan_index) она не выполняется."""
         self.token_manager = token_manager
+        self.account = token_manager.account
+        self.scan_index = scan_index
         self.user_hash = user_hash
-        self.sio = socketio.AsyncClient(reconnection=True, logger=True, engineio_logger=True)
+        self.subsite_id = subsite_id
+        self.websocket_url = websocket_url
+        self.workers = workers
+        self.coalesce_window = coalesce_window
+        self.rescan_threshold = rescan_threshold  # Начиная с этого числа комментариев проверяем пост целиком
+        # socketio тянет за собой aiohttp - это самый долгий импорт службы, поэтому он не выполняется при импорте модуля
+        # (при холодном старте его заранее начинает preload_socketio)
+        import socketio
+        # Свои логгеры вместо logger=True: их уровень задается в log_config (по умолчанию WARNING, без строки на каждый пакет)
+        # Переподключением управляет _watch_forever (ReconnectBackoff + догоняющая проверка), а не сам socketio
+        self.sio = socketio.AsyncClient(reconnection=False, logger=logging.getLogger("socketio.client"), engineio_logger=logging.getLogger("engineio.client"))
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._pending: dict[int, set[int]] = {}  # entryId -> commentId, ожидающие обработки
+        self._pending_since: dict[int, float] = {}  # entryId -> время первого необработанного упоминания
+        self._active: set[int] = set()  # Посты, которые сейчас обрабатывает какой-то воркер
+        self._worker_tasks: list[asyncio.Task] = []
+        self.events_received = 0
+        self.events_coalesced = 0
+        self.events_dropped = 0
+        self.live = asyncio.Event()  # Подписка на канал подтверждена сервером
+        self.live_since: float | None = None  # time.monotonic() последней успешной подписки
+        self._watermark_name = f"watcher_last_seen:{self.account}"
+        self._watermark_saved = 0.0
+        self._catch_up_task: asyncio.Task | None = None
+        self._catch_up_pending = False  # Был еще один разрыв, пока шла догоняющая проверка
+        self._catch_up_pending_since: float | None = None
+        metrics.WATCHER_QUEUE_DEPTH.set_function(lambda: self.queue_depth, account=self.account)
         self._setup_events()
 
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
     def _setup_events(self):
         @self.sio.event
         async def connect():
+            metrics.WEBSOCKET_CONNECTS.inc(account=self.account)
             logger.info("Watcher: Соединение установлено. Подписываюсь на личный канал...")
             channel_name = f"mobile:{self.user_hash}"
             await self.sio.emit("subscribe", {"channel": channel_name}, callback=self.subscription_callback)
@@ -37,81 +123,402 @@ class WebSocketWatcher:
                 comment_data = event_data.get("data", {})
                 entry_id = comment_data.get("entryId")
                 comment_id = comment_data.get("commentId")
-                logger.info(f"Получено упоминание в посте {entry_id}, комментарий {comment_id}")
+                logger.info(f"Получено упоминание в посте {entry_id}, комментарий {comment_id}", extra={"post_id": entry_id, "comment_id": comment_id})
                 if entry_id and comment_id:
-                    try:
-                        await find_and_delete_plus_users_comments('one_post', entry_id, None, self.token_manager)
-                    except Exception as e:
-                        logger.error(f"Ошибка при обработке упоминания: {e}", exc_info=True)
+                    self._enqueue(entry_id, comment_id)
+            self._save_watermark()
 
         @self.sio.event
         async def disconnect():
+            metrics.WEBSOCKET_DISCONNECTS.inc(account=self.account)
+            if self.live.is_set():
+                # До этого момента события точно доходили; пропущенное после него найдет догоняющая проверка
+                self._save_watermark(force=True)
+            self.live.clear()
             logger.warning("Watcher: Отключен от сервера. Попытка переподключения...")
 
+    def _save_watermark(self, force: bool = False):
+        """Запоминает, что события доходили до текущего момента (не чаще раза в WATERMARK_SAVE_INTERVAL)."""
+        if self.scan_index is None:
+            return
+        now = time.monotonic()
+        if force or now - self._watermark_saved >= WATERMARK_SAVE_INTERVAL:
+            self._watermark_saved = now
+            self.scan_index.set_watermark(self._watermark_name, time.time())
+
+    def _schedule_catch_up(self):
+        if self.subsite_id is None or self.scan_index is None:
+            return
+        # Отметку читаем сразу: новые события вот-вот сдвинут ее вперед
+        since = self.scan_index.watermark(self._watermark_name)
+        if self._catch_up_task and not self._catch_up_task.done():
+            # Проверка уже идет; после нее пройдем еще раз, чтобы покрыть и этот разрыв
+            if not self._catch_up_pending:
+                self._catch_up_pending, self._catch_up_pending_since = True, since
+            return
+        self._catch_up_task = asyncio.create_task(self._catch_up(since))
+
+    async def _catch_up(self, since: float | None):
+        """Догоняющая проверка постов; живые события тем временем обрабатываются воркерами как обычно."""
+        while True:
+            started = time.time()
+            try:
+                if since is None:
+                    logger.info("Watcher: Первый запуск, запоминаю счетчики комментариев постов для будущих догоняющих проверок.")
+                else:
+                    logger.info(f"Watcher: Догоняющая проверка постов, события могли теряться с {time.strftime('%H:%M:%S', time.localtime(since))}.")
+                result = await sweep_active_posts(self.subsite_id, self.token_manager, self.scan_index, since)
+                if since is None:
+                    self.scan_index.set_watermark(self._watermark_name, started)
+                elif result.posts:
+                    logger.info(f"Watcher: Догоняющая проверка завершена: постов с новыми комментариями {len(result.posts)}, "
+                                f"удалено {result.deleted}, ошибок {result.failed}, за {time.time() - started:.1f} с.")
+                else:
+                    logger.info("Watcher: Догоняющая проверка завершена, новых комментариев нет.")
+            except Exception as e:
+                logger.error(f"Watcher: Ошибка догоняющей проверки: {e}", exc_info=True)
+            if not self._catch_up_pending:
+                return
+            self._catch_up_pending, since = False, self._catch_up_pending_since
+
+    def _enqueue(self, entry_id: int, comment_id: int):
+        """Ставит упоминание в очередь, объединяя его с уже ожидающими событиями того же поста."""
+        self.events_received += 1
+        metrics.WATCHER_EVENTS.inc(outcome='received', account=self.account)
+        if entry_id in self._pending:
+            self._pending[entry_id].add(comment_id)
+            self.events_coalesced += 1
+            metrics.WATCHER_EVENTS.inc(outcome='coalesced', account=self.account)
+            return
+        self._pending[entry_id] = {comment_id}
+        self._pending_since[entry_id] = time.monotonic()
+        if entry_id not in self._active:
+            # Если пост сейчас обрабатывается, воркер сам поставит его в очередь повторно по завершении
+            self._put(entry_id)
+
+    def _put(self, entry_id: int):
+        try:
+            self._queue.put_nowait((entry_id, time.monotonic()))
+        except asyncio.QueueFull:
+            dropped = self._pending.pop(entry_id, set())
+            self._pending_since.pop(entry_id, None)
+            self.events_dropped += len(dropped)
+            metrics.WATCHER_EVENTS.inc(len(dropped), outcome='dropped', account=self.account)
+            logger.warning(f"⚠️ Watcher: Очередь переполнена, пропущено упоминаний в посте {entry_id}: {len(dropped)} (всего пропущено {self.events_dropped}).")
+
+    def _ensure_workers(self):
+        self._worker_tasks = [task for task in self._worker_tasks if not task.done()]
+        while len(self._worker_tasks) < self.workers:
+            self._worker_tasks.append(asyncio.create_task(self._worker()))
+
+    async def _worker(self):
+        while True:
+            entry_id, enqueued_at = await self._queue.get()
+            try:
+                # Даем время накопиться другим событиям этого же поста
+                delay = enqueued_at + self.coalesce_window - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                comment_ids = self._pending.pop(entry_id, set())
+                first_event_at = self._pending_since.pop(entry_id, enqueued_at)
+                self._active.add(entry_id)
+                await self._process_post(entry_id, comment_ids)
+                latency = time.monotonic() - first_event_at
+                metrics.EVENT_TO_ACTION.observe(latency, account=self.account)
+                logger.info(f"Упоминания в посте {entry_id} обработаны за {latency:.2f} с.", extra={"post_id": entry_id, "latency": round(latency, 3)})
+            except Exception as e:
+                logger.error(f"Ошибка при обработке упоминаний в посте {entry_id}: {e}", exc_info=True)
+            finally:
+                self._active.discard(entry_id)
+                if entry_id in self._pending:
+                    self._put(entry_id)
+                self._queue.task_done()
+
+    async def _process_post(self, entry_id: int, comment_ids: set[int]):
+        """Обрабатывает накопленные упоминания одного поста."""
+        if len(comment_ids) < self.rescan_threshold:
+            # Сначала проверяем только упомянутые комментарии, весь пост - лишь если этого не хватило
+            for comment_id in sorted(comment_ids):
+                result = await handle_single_comment(entry_id, comment_id, self.token_manager, self.scan_index)
+                if result is None:
+                    logger.info(f"Не удалось проверить комментарий {comment_id} отдельно, проверяю весь пост {entry_id}.")
+                    break
+            else:
+                return
+        await find_and_delete_plus_users_comments('one_post', entry_id, None, self.token_manager, scan_index=self.scan_index)
+
     async def subscription_callback(self, status):
         if isinstance(status, dict) and status.get('status') == 'ok':
             logger.info("✅ Подписка на канал прошла успешно!")
+            self.live_since = time.monotonic()
+            self.live.set()
+            self._schedule_catch_up()
         else:
             logger.warning(f"⚠️ Статус подписки не 'ok'. Ответ: {status}")
 
     async def start(self):
         """Запускает и поддерживает подключение к WebSocket."""
+        import socketio
+        self._ensure_workers()
         try:
             logger.info("Watcher: Подключаюсь к WebSocket...")
-            await self.sio.connect(self.DTF_WEBSOCKET_URL, transports=['websocket'])
+            await self.sio.connect(self.websocket_url, transports=['websocket'])
             await self.sio.wait()
         except socketio.exceptions.ConnectionError as e:
-            logger.error(f"Watcher: Ошибка подключения: {e}. Повторная попытка через 60 секунд.")
+            logger.error(f"Watcher: Ошибка подключения: {e}.")
         finally:
             if self.sio.connected:
                 await self.sio.disconnect()
             logger.info("Watcher: Соединение завершено.")
 
-async def main_async():
+    async def stop(self):
+        """Отключается и останавливает воркеров; необработанные упоминания из очереди отбрасываются."""
+        tasks = [*self._worker_tasks, *([self._catch_up_task] if self._catch_up_task else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._catch_up_task = None
+        if self.sio.connected:
+            await self.sio.disconnect()
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Фоновая служба AntiDTFPlus")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Отдавать метрики в формате Prometheus на http://127.0.0.1:PORT/metrics (по умолчанию выключено)")
+    parser.add_argument("--metrics-interval", type=float, default=60.0,
+                        help="Как часто сохранять снимок метрик в metrics.json, с (0 - не сохранять)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Напечатать разбивку времени импорта и инициализации до подключения watcher")
+    parser.add_argument("--account", action="append", dest="accounts", metavar="NAME",
+                        help="Следить только за этим аккаунтом (можно указать несколько раз). "
+                             "По умолчанию - за всеми: аккаунтом GUI и добавленными через --add-account")
+    parser.add_argument("--add-account", metavar="NAME",
+                        help="Добавить аккаунт по refreshToken (его спросят, если не указан --refresh-token) и выйти")
+    parser.add_argument("--refresh-token", help="refreshToken для --add-account")
+    parser.add_argument("--no-poll", dest="poll", action="store_false",
+                        help="Не опрашивать ленту: ловить только комментарии с упоминаниями (события WebSocket)")
+    return parser.parse_args(argv)
+
+async def run_from_args(args: argparse.Namespace, profile: StartupProfile | None = None):
+    """Точка входа службы (auto_service.py и run_service.py)."""
+    if args.add_account:
+        refresh_token = args.refresh_token or getpass.getpass(f"refreshToken для аккаунта {args.add_account}: ")
+        await add_account(args.add_account, refresh_token.strip())
+        return
+    await main_async(args.metrics_port, args.metrics_interval, profile, args.accounts, args.poll)
+
+async def add_account(name: str, refresh_token: str) -> dict | None:
+    """Входит в аккаунт name по refreshToken и сохраняет его токены и профиль. Возвращает данные пользователя или None."""
+    account = get_account(name)
+    async with DtfClient() as client:
+        token_manager = TokenManager(client=client, cache_file=account.token_cache_file, account=account.name)
+        token_manager.refresh_token = refresh_token
+        await token_manager.refresh()
+        user_data = await get_user_info(token_manager) if token_manager.access_token else None
+    if not user_data or not user_data.get('userHash'):
+        logger.error(f"❌ Не удалось войти в аккаунт {name}: проверьте refreshToken.")
+        return None
+    save_profile(user_data, account.profile_cache_file)
+    logger.info(f"✅ Аккаунт {name} добавлен: {user_data.get('name')}. Служба будет следить за ним после перезапуска.")
+    return user_data
+
+async def preload_socketio(profile: StartupProfile | None = None):
+    """Импортирует socketio в отдельном потоке, пока event loop занят сетевыми запросами."""
+    start = time.perf_counter()
+    await asyncio.to_thread(importlib.import_module, "socketio")
+    if profile:
+        profile.add("import socketio (в потоке)", start)
+
+async def main_async(metrics_port: int | None = None, metrics_interval: float = 60.0, profile: StartupProfile | None = None, account_names: list[str] | None = None, poll: bool = True):
     """
     Основная асинхронная логика. Теперь не принимает stop_event.
+    Все аккаунты обслуживаются в одном event loop через один DtfClient: пул соединений и лимит темпа общие.
+    :param account_names: Имена аккаунтов; None - все, для которых есть кэш токенов.
+    :param poll: Опрашивать ленту (ActivityPoller) в дополнение к событиям WebSocket.
     """
     logger.info("Запуск фонового процесса...")
-    token_manager = TokenManager()
+    accounts = [get_account(name) for name in account_names] if account_names else list_accounts()
+    metrics_server = await metrics.start_metrics_server(metrics_port) if metrics_port else None
+    snapshot_task = asyncio.create_task(metrics.snapshot_loop(metrics_interval)) if metrics_interval > 0 else None
+    try:
+        async with DtfClient() as client:
+            await _run_service(client, accounts, profile, poll)
+    finally:
+        if snapshot_task:
+            snapshot_task.cancel()
+        if metrics_server:
+            metrics_server.close()
+
+AUTH_FAILURE_STATUSES = (401, 403)  # Вход отклонен: повторять проверку бессмысленно
+
+async def _validate_profile(client: DtfClient, token_manager: TokenManager, account: Account, profile: StartupProfile | None, backoff: ReconnectBackoff | None = None) -> dict | None:
+    """
+    Проверяет токены и получает профиль через REST. Возвращает данные пользователя или None, если вход отклонен.
+    Временные сбои (нет сети сразу после загрузки системы, 5xx, 429) повторяются с нарастающей задержкой.
+    """
+    start = time.perf_counter()
+    await client.prewarm()
+    if profile:
+        profile.add(f"REST: прогрев соединения ({account.name})", start)
+    backoff = backoff or ReconnectBackoff(first_delay=2.0, max_delay=300.0)
+    start = time.perf_counter()
+    while True:
+        try:
+            user_data = await get_user_info(token_manager, strict=True)
+            break
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in AUTH_FAILURE_STATUSES:
+                logger.error(f"❌ Вход отклонен API ({e.response.status_code}).")
+                return None
+            error = e
+        except (httpx.HTTPError, ValueError) as e:  # ValueError - обрезанный или не JSON ответ
+            error = e
+        delay = backoff.next_delay()
+        logger.warning(f"⚠️ Не удалось проверить вход ({error!r}), повтор через {delay:.1f} с (попытка {backoff.attempt}).")
+        await asyncio.sleep(delay)
+    if profile:
+        profile.add(f"REST: токены + профиль ({account.name})", start)
+    if not user_data or not user_data.get('userHash'):
+        return None
+    save_profile(user_data, account.profile_cache_file)
+    return user_data
 
+async def _run_service(client: DtfClient, accounts: list[Account], profile: StartupProfile | None = None, poll: bool = True):
+    if not accounts:
+        logger.error("RefreshToken не найден. Запустите GUI для входа.")
+        return
+    logger.info(f"Аккаунтов под наблюдением: {len(accounts)} ({', '.join(account.name for account in accounts)}).")
+    # socketio нужен всем аккаунтам: импортируем его один раз, параллельно с REST-проверками
+    socketio_ready = asyncio.create_task(preload_socketio(profile))
+    scan_index = ScanIndex()
+    tasks = [asyncio.create_task(_run_account(client, account, scan_index, socketio_ready, profile, poll)) for account in accounts]
     try:
-        if not token_manager.refresh_token:
-            logger.error("RefreshToken не найден. Запустите GUI для входа.")
-            return
+        await asyncio.gather(*tasks)
+    finally:
+        for task in (*tasks, socketio_ready):
+            task.cancel()
+        await asyncio.gather(*tasks, socketio_ready, return_exceptions=True)
 
-        await token_manager.refresh()
-        user_data = await get_user_info(token_manager)
-        user_hash = user_data.get('userHash')
+async def _run_account(client: DtfClient, account: Account, scan_index: ScanIndex, socketio_ready: asyncio.Task, profile: StartupProfile | None, poll: bool):
+    """Проверка входа и watcher одного аккаунта. Ошибка одного аккаунта не останавливает остальные."""
+    # Все задачи аккаунта (воркеры, обработчики socketio) наследуют этот контекст и пишут в лог его имя
+    current_account.set(account.name)
+    try:
+        await _watch_account(client, account, scan_index, socketio_ready, profile, poll)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.critical(f"Наблюдение за аккаунтом остановлено из-за ошибки: {e}", exc_info=True)
 
-        if not user_hash:
-            logger.error(f"Не удалось получить 'userHash': {user_data}")
-            return
-        
-        logger.info(f"Успешно получены данные для пользователя: {user_data.get('name')}")
-        watcher = WebSocketWatcher(token_manager, user_hash)
+async def _watch_account(client: DtfClient, account: Account, scan_index: ScanIndex, socketio_ready: asyncio.Task, profile: StartupProfile | None, poll: bool):
+    with profile.span(f"кэш токенов и профиля ({account.name})") if profile else contextlib.nullcontext():
+        token_manager = TokenManager(client=client, cache_file=account.token_cache_file, account=account.name)
+        cached_profile = load_profile(account.profile_cache_file)
 
+    if not token_manager.refresh_token:
+        logger.error("RefreshToken не найден. Запустите GUI для входа.")
+        return
+
+    # REST-проверка и импорт socketio идут параллельно; с кэшированным userHash сокет подключается, не дожидаясь REST
+    validation = asyncio.create_task(_validate_profile(client, token_manager, account, profile))
+    try:
+        if cached_profile:
+            user = cached_profile
+            logger.info(f"Использую сохраненный профиль пользователя {cached_profile.get('name')}, проверяю его параллельно с подключением.")
+        else:
+            user_data = await validation
+            if user_data is None:
+                logger.error("Не удалось получить 'userHash'. Проверьте вход в GUI.")
+                return
+            user = user_data
+            logger.info(f"Успешно получены данные для пользователя: {user_data.get('name')}")
+        # shield: импорт общий для всех аккаунтов, отмена одного из них не должна его прерывать
+        await asyncio.shield(socketio_ready)
+    except asyncio.CancelledError:
+        validation.cancel()
+        raise
     except Exception as e:
         logger.critical(f"Критическая ошибка при инициализации: {e}", exc_info=True)
+        validation.cancel()
         return
 
-    # Основной цикл: просто перезапускает watcher при разрыве связи
-    while True:
-        try:
-            await watcher.start()
-            logger.info("Ожидание 60 секунд перед попыткой переподключения...")
-            await asyncio.sleep(60)
-        except Exception as e:
-            logger.error(f"Непредвиденная ошибка в главном цикле: {e}", exc_info=True)
-            await asyncio.sleep(60)
+    watch_task = _start_watcher(token_manager, user, scan_index, profile, poll)
+    try:
+        if cached_profile:
+            try:
+                user_data = await validation
+            except Exception as e:
+                logger.error(f"Ошибка при проверке профиля: {e}", exc_info=True)
+                user_data = None
+            if user_data is None:
+                # Без действующих токенов watcher не сможет удалять комментарии
+                logger.error("Не удалось подтвердить вход через API. Запустите GUI для входа.")
+                return
+            if user_data['userHash'] != user['userHash']:
+                # В GUI вошли в другой аккаунт: переподписываемся на его канал
+                logger.info(f"Профиль изменился, переподключаюсь для пользователя {user_data.get('name')}.")
+                watch_task.cancel()
+                await asyncio.gather(watch_task, return_exceptions=True)
+                watch_task = _start_watcher(token_manager, user_data, scan_index, profile, poll)
+            else:
+                logger.info(f"Профиль пользователя {user_data.get('name')} подтвержден.")
+        await watch_task
+    finally:
+        # Остановка службы (или ошибка проверки) должна остановить и watcher
+        watch_task.cancel()
+        validation.cancel()
+        await asyncio.gather(watch_task, validation, return_exceptions=True)
 
+def _start_watcher(token_manager: TokenManager, user: dict, scan_index: ScanIndex, profile: StartupProfile | None, poll: bool = True) -> asyncio.Task:
+    """:param user: Профиль пользователя (userHash - канал событий, id - лента постов для догоняющей проверки и опроса)."""
+    watcher = WebSocketWatcher(token_manager, user['userHash'], scan_index, subsite_id=user.get('id'))
+    poller = ActivityPoller(token_manager, user['id'], scan_index) if poll and user.get('id') else None
+    return asyncio.create_task(_watch_forever(watcher, poller=poller, profile=profile))
+
+async def _report_when_live(watcher: WebSocketWatcher, profile: StartupProfile):
+    await watcher.live.wait()
+    if profile.reported:
+        return  # Отчет уже выдал watcher другого аккаунта
+    report = profile.report()
+    logger.info(report)
+    print(report, flush=True)
+
+async def _watch_forever(watcher: WebSocketWatcher, backoff: ReconnectBackoff | None = None, poller: ActivityPoller | None = None, profile: StartupProfile | None = None):
+    # Основной цикл: перезапускает watcher при разрыве связи с нарастающей задержкой.
+    # Опрос ленты и отчет о старте идут независимо от состояния сокета и останавливаются вместе с watcher
+    backoff = backoff or ReconnectBackoff()
+    poll_task = asyncio.create_task(poller.run()) if poller else None
+    report_task = asyncio.create_task(_report_when_live(watcher, profile)) if profile and not profile.reported else None
+    try:
+        while True:
+            connected_at = time.monotonic()
+            try:
+                await watcher.start()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Непредвиденная ошибка в главном цикле: {e}", exc_info=True)
+            if watcher.live_since is not None and watcher.live_since >= connected_at and time.monotonic() - watcher.live_since >= backoff.reset_after:
+                backoff.reset()  # Соединение было рабочим - это новый сбой, а не продолжение старого
+            delay = backoff.next_delay()
+            logger.info(f"Переподключение через {delay:.1f} с (попытка {backoff.attempt})...")
+            await asyncio.sleep(delay)
+    finally:
+        side_tasks = [task for task in (poll_task, report_task) if task]
+        for task in side_tasks:
+            task.cancel()
+        await asyncio.gather(*side_tasks, return_exceptions=True)
+        await watcher.stop()
 
 if __name__ == '__main__':
     # Устанавливаем рабочую директорию, чтобы находить файлы (например, токен)
     if getattr(sys, 'frozen', False):
         os.chdir(os.path.dirname(sys.executable))
         
+    args = parse_args()
     try:
-        asyncio.run(main_async())
+        asyncio.run(run_from_args(args, StartupProfile() if args.profile_startup else None))
     except KeyboardInterrupt:
         logger.info("Процесс прерван пользователем.")
     except Exception as e:
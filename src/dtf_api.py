@@ -1,47 +1,351 @@
 import asyncio
+import base64
+import email.utils
 import json
 import os
+import re
+import time
+import weakref
 import httpx
 import logging
-from typing import Literal
+from dataclasses import dataclass, field, replace
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Literal
+from . import metrics
 from .log_config import setup_logging
+from .scan_index import ScanIndex
+from .sweep_journal import SweepJournal
+from .token_store import TokenStore
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
 APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".antidtfplus")
 TOKEN_CACHE_FILE = os.path.join(APP_DATA_DIR, "token_cache.json")
+DEFAULT_ACCOUNT = "default"  # Аккаунт, в который входят через GUI (token_cache.json); остальные см. accounts.py
+
+DTF_API_URL = "https://api.dtf.ru"
+USER_AGENT = "Mozilla/5.0 (Android 14; Mobile; rv:137.0) Gecko/137.0 Firefox/137.0"
+
+RateClass = Literal['read', 'write']
+
+@dataclass
+class RateLimit:
+    """Настройки темпа для одного класса запросов."""
+    rate: float  # Максимальный темп, запросов в секунду
+    burst: int  # Емкость token bucket
+    max_concurrency: int  # Максимум одновременных запросов этого класса
+    min_rate: float = 0.5  # Ниже этого темпа AIMD не опускается
+
+DEFAULT_RATE_LIMITS: dict[RateClass, RateLimit] = {
+    'read': RateLimit(rate=10.0, burst=10, max_concurrency=8),
+    'write': RateLimit(rate=2.0, burst=3, max_concurrency=3),
+}
+
+MAX_RETRY_AFTER = 120.0  # Дольше этого не ждем, даже если сервер просит
+THROTTLE_COOLDOWN = 1.0  # Пачка 429 от одновременных запросов снижает темп только один раз
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "DELETE"})
+_ENDPOINT_ID = re.compile(r"/\d+")  # /v3.0/comments/123 -> /v3.0/comments/{id} для меток метрик
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Разбирает заголовок Retry-After: число секунд или HTTP-дата."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class AdaptiveRateLimiter:
+    """
+    Ограничитель темпа для одного класса запросов: token bucket плюс AIMD-регулировка.
+    При 429/5xx темп и число одновременных запросов уменьшаются вдвое, при успешных ответах
+    плавно растут обратно до значений из RateLimit. Retry-After приостанавливает весь класс.
+    Использует asyncio.Condition, поэтому создается отдельно для каждого event loop.
+    """
+
+    def __init__(self, name: str, limit: RateLimit):
+        self.name = name
+        self.limit = limit
+        self.rate = limit.rate
+        self.concurrency = float(limit.max_concurrency)
+        self._tokens = float(limit.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._in_flight = 0
+        self._slot_freed = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._slot_freed:
+            await self._slot_freed.wait_for(lambda: self._in_flight < int(self.concurrency))
+            self._in_flight += 1
+        try:
+            await self._take_token()
+        except BaseException:
+            await self.__aexit__()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        async with self._slot_freed:
+            self._in_flight -= 1
+            self._slot_freed.notify_all()
+
+    async def _take_token(self):
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            self._tokens = min(float(self.limit.burst), self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def on_success(self):
+        """Аддитивное увеличение: примерно +1 к параллелизму за «окно» успешных запросов."""
+        self.concurrency = min(float(self.limit.max_concurrency), self.concurrency + 1 / self.concurrency)
+        self.rate = min(self.limit.rate, self.rate + self.limit.rate / 10)
+
+    def on_throttle(self, retry_after: float | None):
+        """Мультипликативное уменьшение и пауза на время Retry-After."""
+        now = time.monotonic()
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + min(retry_after, MAX_RETRY_AFTER))
+        if now - self._last_decrease < THROTTLE_COOLDOWN:
+            return
+        self._last_decrease = now
+        self.concurrency = max(1.0, self.concurrency / 2)
+        self.rate = max(self.limit.min_rate, self.rate / 2)
+        self._tokens = min(self._tokens, 0.0)
+        logger.warning(f"⚠️ Ограничение темпа ({self.name}): темп {self.rate:.2f} запр/с, параллелизм {int(self.concurrency)}, Retry-After {retry_after}.")
+
+class DtfClient:
+    """
+    Долгоживущая HTTP-сессия к api.dtf.ru.
+    Держит один пул соединений с keep-alive (и HTTP/2, если установлен пакет h2),
+    чтобы не платить за TCP+TLS рукопожатие на каждый запрос.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 15.0,
+        connect_timeout: float = 5.0,
+        http2: bool = True,
+        max_concurrent_requests: int = 10,
+        rate_limits: dict[RateClass, RateLimit] | None = None,
+        max_retries: int = 3,
+        base_url: str = DTF_API_URL,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = http2 and self._h2_available()
+        self.max_concurrent_requests = max_concurrent_requests
+        self.rate_limits = rate_limits or DEFAULT_RATE_LIMITS
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self._client: httpx.AsyncClient | None = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+        self._request_slots: asyncio.Semaphore | None = None
+        self._rate_limiters: dict[RateClass, AdaptiveRateLimiter] = {}
+
+    @staticmethod
+    def _h2_available() -> bool:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.info("DtfClient: пакет h2 не установлен, используется HTTP/1.1.")
+            return False
+        return True
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Возвращает httpx.AsyncClient, привязанный к текущему event loop.
+        Пул соединений нельзя переносить между циклами, поэтому при смене цикла создается новый.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"User-Agent": USER_AGENT},
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+            )
+            self._client_loop = loop
+            # При HTTP/2 пул не ограничивает число потоков в соединении, поэтому лимит держим сами
+            self._request_slots = asyncio.Semaphore(self.max_concurrent_requests)
+            self._rate_limiters = {name: AdaptiveRateLimiter(name, limit) for name, limit in self.rate_limits.items()}
+        return self._client
+
+    async def request(self, method: str, url: str, rate_class: RateClass = 'read', account: str = DEFAULT_ACCOUNT, **kwargs) -> httpx.Response:
+        """
+        Выполняет запрос с учетом лимитов темпа класса rate_class.
+        429 повторяется всегда, 5xx - только для идемпотентных методов (повтор POST мог бы задвоить комментарий).
+        Лимиты общие для всех аккаунтов клиента; account - только метка в метриках.
+        """
+        client = self.client
+        limiter = self._rate_limiters[rate_class]
+        for attempt in range(self.max_retries + 1):
+            async with limiter, self._request_slots:
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except httpx.HTTPError:
+                    self._observe(method, url, "error", started, account)
+                    raise
+            self._observe(method, url, response.status_code, started, account)
+
+            if response.status_code != 429 and response.status_code < 500:
+                limiter.on_success()
+                return response
+
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            limiter.on_throttle(retry_after)
+            retryable = response.status_code == 429 or method in IDEMPOTENT_METHODS
+            if not retryable or attempt == self.max_retries or (retry_after or 0) > MAX_RETRY_AFTER:
+                return response
+            logger.info(f"🔁 {method} {url}: ответ {response.status_code}, повтор {attempt + 1}/{self.max_retries}.",
+                        extra={"method": method, "url": url, "status": response.status_code, "attempt": attempt + 1})
+            if retry_after is None:
+                # Без Retry-After ждем с экспоненциальной задержкой; иначе паузу выдерживает сам ограничитель
+                await asyncio.sleep(min(2 ** attempt, 30))
+        return response
+
+    @staticmethod
+    def _observe(method: str, url: str, status, started: float, account: str) -> None:
+        latency = time.perf_counter() - started
+        endpoint = _ENDPOINT_ID.sub("/{id}", url.split("?", 1)[0])
+        metrics.HTTP_REQUESTS.inc(method=method, endpoint=endpoint, status=status, account=account)
+        metrics.HTTP_LATENCY.observe(latency, method=method, endpoint=endpoint)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{method} {url}: {status} за {latency * 1000:.0f} мс",
+                         extra={"method": method, "url": url, "status": status, "latency": round(latency, 4)})
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+    async def prewarm(self) -> None:
+        """Заранее открывает соединение с api.dtf.ru, чтобы первый настоящий запрос не ждал рукопожатия."""
+        try:
+            await self.client.head("/")
+            logger.info("✅ DtfClient: Соединение с API прогрето.")
+        except httpx.HTTPError as e:
+            logger.warning("⚠️ DtfClient: Не удалось прогреть соединение: %s", e)
+
+    async def aclose(self) -> None:
+        """Закрывает пул соединений."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+        self._request_slots = None
+        self._rate_limiters = {}
+
+    async def __aenter__(self) -> "DtfClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+_default_client: DtfClient | None = None
+
+def get_default_client() -> DtfClient:
+    """Общий для всего процесса экземпляр DtfClient."""
+    global _default_client
+    if _default_client is None:
+        _default_client = DtfClient()
+    return _default_client
+
+def _auth_headers(access_token: str | None) -> dict:
+    return {"jwtauthorization": f"Bearer {access_token}"}
+
+TOKEN_REFRESH_MARGIN = 60  # За сколько секунд до истечения access_token его пора обновлять
+
+def _jwt_expiry(token: str | None) -> float | None:
+    """Достает время истечения (exp) из payload JWT без проверки подписи."""
+    if not token:
+        return None
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
 
 class TokenManager:
-    def __init__(self, email: str | None = None, password: str | None = None):
+    def __init__(self, email: str | None = None, password: str | None = None, client: DtfClient | None = None, cache_file: str | None = TOKEN_CACHE_FILE, account: str = DEFAULT_ACCOUNT):
+        """
+        :param cache_file: Путь к файлу кэша токенов; None - токены только в памяти.
+        Файл общий для GUI и фоновой службы: обновление токенов выполняется под межпроцессной блокировкой,
+        а токены, обновленные другим процессом, подхватываются без лишнего запроса к API.
+        :param account: Имя аккаунта для меток метрик; у каждого аккаунта свой файл кэша токенов.
+        """
+        self.account = account
         self.email = email
         self.password = password
+        self.client = client or get_default_client()
+        self.cache_file = cache_file
+        self.store = TokenStore(cache_file) if cache_file else None
         self.access_token = None
         self.refresh_token = None
+        self._refresh_task: asyncio.Task | None = None
+        self._holding_store_lock = False
         self._load_tokens_from_cache()
 
     def _load_tokens_from_cache(self):
         """Загружает токены из файла кэша при инициализации."""
-        try:
-            if os.path.exists(TOKEN_CACHE_FILE):
-                with open(TOKEN_CACHE_FILE, 'r') as f:
-                    tokens = json.load(f)
-                    self.access_token = tokens.get("accessToken")
-                    self.refresh_token = tokens.get("refreshToken")
-                    if self.access_token and self.refresh_token:
-                        logger.info("✅ TokenManager: Токены успешно загружены из кэша.")
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.warning("⚠️ TokenManager: Не удалось загрузить токены из кэша: %s", e)
+        if self.store is None:
+            return
+        self.access_token, self.refresh_token = self.store.load()
+        if self.access_token and self.refresh_token:
+            logger.info("✅ TokenManager: Токены успешно загружены из кэша.")
+
+    def _sync_from_cache(self) -> bool:
+        """
+        Подхватывает токены, если их обновил другой процесс (GUI или служба). Обычно это один вызов stat.
+        Токены не подменяются, если refresh_token задан вручную и не совпадает с тем, что был в кэше.
+        Возвращает True, если токены изменились.
+        """
+        if self.store is None or not self.store.changed_on_disk():
+            return False
+        known_refresh_token = self.store.tokens[1]
+        access_token, refresh_token = self.store.load()
+        if self.refresh_token not in (None, known_refresh_token) or not refresh_token:
+            return False
+        if (access_token, refresh_token) == (self.access_token, self.refresh_token):
+            return False
+        self.access_token, self.refresh_token = access_token, refresh_token
+        logger.info("🔄 TokenManager: Токены обновлены другим процессом, использую их.")
+        return True
 
     def _save_tokens_to_cache(self):
-        """Сохраняет текущие токены в файл кэша."""
-        tokens = {
-            "accessToken": self.access_token,
-            "refreshToken": self.refresh_token
-        }
-        with open(TOKEN_CACHE_FILE, 'w') as f:
-            json.dump(tokens, f)
-        logger.info("💾 TokenManager: Токены сохранены в кэш.")
+        """Сохраняет текущие токены в файл кэша (атомарно и только если они изменились)."""
+        if self.store is None:
+            return
+        if self.store.save(self.access_token, self.refresh_token, already_locked=self._holding_store_lock):
+            logger.info("💾 TokenManager: Токены сохранены в кэш.")
 
     async def login(self) -> bool:
         """Выполняет первоначальный вход и сохраняет токены."""
@@ -49,70 +353,134 @@ class TokenManager:
             logger.info("✅ TokenManager: Токены уже есть, вход не требуется.")
             return True
 
-        url = "https://api.dtf.ru/v3.4/auth/email/login"
+        url = "/v3.4/auth/email/login"
         payload = {"email": self.email, "password": self.password}
-        headers = {"User-Agent": "Mozilla/5.0 (Android 14; Mobile; rv:137.0) Gecko/137.0 Firefox/137.0"}
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, data=payload, headers=headers)
-            if response.status_code == 200:
-                data = response.json().get("data", {})
-                self.access_token = data.get("accessToken")
-                self.refresh_token = data.get("refreshToken")
-                if self.access_token and self.refresh_token:
-                    logger.info("✅ TokenManager: Успешный вход, токены получены.")
-                    self._save_tokens_to_cache()
-                    return True
+
+        response = await self.client.post(url, data=payload, account=self.account)
+        if response.status_code == 200:
+            data = response.json().get("data", {})
+            self.access_token = data.get("accessToken")
+            self.refresh_token = data.get("refreshToken")
+            if self.access_token and self.refresh_token:
+                logger.info("✅ TokenManager: Успешный вход, токены получены.")
+                self._save_tokens_to_cache()
+                return True
         logger.error("❌ TokenManager: Ошибка входа.")
         return False
 
-    async def refresh(self):
-        """Обновляет токены, используя refresh_token."""
+    def is_access_token_fresh(self) -> bool:
+        """Проверяет, что access_token есть и не истекает в ближайшие TOKEN_REFRESH_MARGIN секунд."""
+        if not self.access_token:
+            return False
+        expiry = _jwt_expiry(self.access_token)
+        if expiry is None:
+            # Срок действия неизвестен - полагаемся на повтор запроса после 401
+            return True
+        return expiry - time.time() > TOKEN_REFRESH_MARGIN
+
+    async def ensure_fresh(self):
+        """Обновляет токены, только если access_token отсутствует или скоро истечет."""
+        if not self.is_access_token_fresh() and not (self._sync_from_cache() and self.is_access_token_fresh()):
+            await self.refresh()
+
+    async def refresh(self, stale_token: str | None = None):
+        """
+        Обновляет токены, используя refresh_token.
+        Одновременные вызовы ждут одно общее обновление, чтобы не инвалидировать refresh_token друг друга.
+        :param stale_token: access_token, отвергнутый сервером. Если его уже заменили, обновление не выполняется.
+        """
+        self._sync_from_cache()
+        if stale_token is not None and stale_token != self.access_token:
+            return
+
+        loop = asyncio.get_running_loop()
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = self._refresh_task = loop.create_task(self._refresh())
+        # shield: отмена одного из ожидающих не должна прерывать общее обновление
+        await asyncio.shield(task)
+
+    async def _refresh(self):
+        if self.store is None:
+            await self._refresh_tokens()
+            return
+        # Служба и GUI не должны обновлять токены одновременно: refresh_token одноразовый,
+        # и второе обновление тем же токеном разлогинило бы первого
+        async with self.store.lock.hold():
+            self._holding_store_lock = True
+            try:
+                # Пока ждали блокировку, другой процесс мог уже обновить токены
+                if self._sync_from_cache() and self.is_access_token_fresh():
+                    return
+                await self._refresh_tokens()
+            finally:
+                self._holding_store_lock = False
+
+    async def _refresh_tokens(self):
         if not self.refresh_token:
             logger.warning("⚠️ TokenManager: Нет refresh_token для обновления. Попытка полного входа.")
             await self.login()
             return
 
-        url = "https://api.dtf.ru/v3.4/auth/refresh"
+        url = "/v3.4/auth/refresh"
         payload = {"token": self.refresh_token}
-        headers = {"User-Agent": "Mozilla/5.0 (Android 14; Mobile; rv:137.0) Gecko/137.0 Firefox/137.0"}
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, data=payload, headers=headers)
-            if response.status_code == 200:
-                data = response.json().get("data", {})
-                self.access_token = data.get("accessToken")
-                self.refresh_token = data.get("refreshToken")
-                self._save_tokens_to_cache()
-                logger.info("✅ TokenManager: Токены успешно обновлены.")
-            else:
-                logger.error("❌ TokenManager: Ошибка обновления токена. Попытка полного входа.")
-                await self.login()
-
-async def get_user_info(token_manager: TokenManager) -> dict:
-    """Получаем данные о пользователе, включая userHash и mHash."""
-    await token_manager.refresh()  # Убедимся, что токены актуальны
+
+        response = await self.client.post(url, data=payload, account=self.account)
+        if response.status_code == 200:
+            data = response.json().get("data", {})
+            self.access_token = data.get("accessToken")
+            self.refresh_token = data.get("refreshToken")
+            self._save_tokens_to_cache()
+            metrics.TOKEN_REFRESHES.inc(result="ok", account=self.account)
+            logger.info("✅ TokenManager: Токены успешно обновлены.")
+        elif response.status_code == 429 or response.status_code >= 500:
+            # Временный сбой API, а не отказ: refresh_token еще действителен, входить заново незачем
+            metrics.TOKEN_REFRESHES.inc(result="failed", account=self.account)
+            logger.warning(f"⚠️ TokenManager: API временно не обновляет токены ({response.status_code}).")
+            raise httpx.HTTPStatusError(f"Обновление токенов: HTTP {response.status_code}", request=response.request, response=response)
+        else:
+            metrics.TOKEN_REFRESHES.inc(result="failed", account=self.account)
+            logger.error("❌ TokenManager: Ошибка обновления токена. Попытка полного входа.")
+            await self.login()
+
+async def _api_request(token_manager: TokenManager, method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Выполняет авторизованный запрос к API.
+    Токен обновляется заранее, если скоро истечет; при ответе 401 токен обновляется и запрос повторяется один раз.
+    """
+    await token_manager.ensure_fresh()
+    access_token = token_manager.access_token
+    response = await token_manager.client.request(method, url, headers=_auth_headers(access_token), account=token_manager.account, **kwargs)
+    if response.status_code == 401:
+        logger.info(f"🔑 {method} {url}: access_token отклонен, обновляю и повторяю запрос.")
+        await token_manager.refresh(stale_token=access_token)
+        response = await token_manager.client.request(method, url, headers=_auth_headers(token_manager.access_token), account=token_manager.account, **kwargs)
+    return response
+
+async def get_user_info(token_manager: TokenManager, strict: bool = False) -> dict:
+    """Получаем данные о пользователе, включая userHash и mHash.
+    :param strict: Пробрасывать ошибки (сеть, HTTP-статус), а не возвращать None - когда вызывающему важно
+        отличить временный сбой от отклоненного входа (например, служба при старте без сети).
+    """
+    await token_manager.ensure_fresh()  # Убедимся, что токены актуальны
     access_token = token_manager.access_token
     if not access_token:
         logger.error("❌ get_user_info: Нет access_token.")
         return None
     
-    url = "https://api.dtf.ru/v2.31/subsite/me"
-    headers = {
-        "jwtauthorization": f"Bearer {access_token}",
-        "User-Agent": "Mozilla/5.0 (Android 14; Mobile; rv:137.0) Gecko/137.0 Firefox/137.0"
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            # Извлекаем данные из правильного места в JSON
-            result_data = response.json().get("result", {})
-            logger.info("✅ Данные пользователя успешно получены.")
-            return result_data
-        
-        except Exception as e:
-            logger.error("❌ get_user_info: Ошибка при получении или парсинге данных: %s", e, exc_info=True)
+    url = "/v2.31/subsite/me"
+    try:
+        response = await _api_request(token_manager, "GET", url)
+        response.raise_for_status()
+        # Извлекаем данные из правильного места в JSON
+        result_data = response.json().get("result", {})
+        logger.info("✅ Данные пользователя успешно получены.")
+        return result_data
+    
+    except Exception as e:
+        if strict:
+            raise
+        logger.error("❌ get_user_info: Ошибка при получении или парсинге данных: %s", e, exc_info=True)
     
     logger.error("❌ get_user_info: Не удалось получить информацию о пользователе.")
     return None
@@ -123,26 +491,21 @@ async def send_comment(post_id: int, reply_to_id: int, text: str, token_manager:
     :param text: Текст комментария.
     :param token_manager: Экземпляр TokenManager для управления токенами.
     """
-    url = f"https://api.dtf.ru/v2.4/comment/add"
-    headers = {
-        "jwtauthorization": f"Bearer {token_manager.access_token}",
-        "User-Agent": "Mozilla/5.0 (Android 14; Mobile; rv:137.0) Gecko/137.0 Firefox/137.0"
-    }
+    url = "/v2.4/comment/add"
     payload = {
         "id": post_id,
         "text": text,
         "reply_to": reply_to_id
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, data=payload, headers=headers)
-        if response.status_code == 200:
-            comment_id = response.json().get("result", {}).get("id")
-            logger.info(f"✅ Комментарий успешно отправлен с ID {comment_id}.")
-            return comment_id
-        else:
-            logger.error(f"❌ Ошибка при отправке комментария: {response.text}")
-            return -1
+    response = await _api_request(token_manager, "POST", url, rate_class='write', data=payload)
+    if response.status_code == 200:
+        comment_id = response.json().get("result", {}).get("id")
+        logger.info(f"✅ Комментарий успешно отправлен с ID {comment_id}.", extra={"post_id": post_id, "comment_id": comment_id})
+        return comment_id
+    else:
+        logger.error(f"❌ Ошибка при отправке комментария: {response.text}")
+        return -1
 
 async def delete_comment(comment_id: int, withThread: bool, token_manager: TokenManager) -> bool:
     """Удаляет комментарий по его ID.
@@ -150,144 +513,621 @@ async def delete_comment(comment_id: int, withThread: bool, token_manager: Token
     :param withThread: Удалять ли ветку комментариев.
     :param token_manager: Экземпляр TokenManager для управления токенами.
     """
-    url = f"https://api.dtf.ru/v3.0/comments/{comment_id}"
-    headers = {
-        "jwtauthorization": f"Bearer {token_manager.access_token}",
-        "User-Agent": "Mozilla/5.0 (Android 14; Mobile; rv:137.0) Gecko/137.0 Firefox/137.0"
-    }
+    url = f"/v3.0/comments/{comment_id}"
     params = {
         "withThread": withThread
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(url, headers=headers, params=params)
-        if response.status_code == 200:
-            logger.info(f"✅ Комментарий {comment_id} успешно удален.")
-            return True
-        else:
-            logger.error(f"❌ Ошибка при удалении комментария {comment_id}: {response.text}")
-            return False
+    response = await _api_request(token_manager, "DELETE", url, rate_class='write', params=params)
+    if response.status_code == 200:
+        logger.info(f"✅ Комментарий {comment_id} успешно удален.", extra={"comment_id": comment_id})
+        return True
+    elif response.status_code == 404:
+        # Повтор уже выполненного удаления (например, после обрыва связи) - комментария уже нет
+        logger.info(f"✅ Комментарий {comment_id} уже удален.", extra={"comment_id": comment_id})
+        return True
+    else:
+        logger.error(f"❌ Ошибка при удалении комментария {comment_id}: {response.text}", extra={"comment_id": comment_id, "status": response.status_code})
+        return False
 
-async def get_subsite_posts(subsite_id: int, token_manager: TokenManager) -> list:
+async def iter_subsite_posts(subsite_id: int, token_manager: TokenManager, strict: bool = False) -> AsyncIterator[list]:
     """
-    Получает список всех постов у подсайта/пользователя, используя итеративную загрузку.
+    Постранично загружает посты подсайта/пользователя, отдавая каждую страницу сразу по мере получения.
     :param subsite_id: ID подсайта/пользователя.
     :param token_manager: Экземпляр TokenManager для управления токенами.
+    :param strict: Пробрасывать ошибки загрузки, а не завершать ленту молча - когда вызывающему важно
+        отличить конец ленты от сбоя (например, полная синхронизация кэша постов).
     """
-    await token_manager.refresh()
-    
-    all_posts = []
+    loaded_count = 0
     lastId = 0
     lastSortingValue = 0
     
-    url = f"https://api.dtf.ru/v2.8/timeline"
-    headers = {
-        "jwtauthorization": f"Bearer {token_manager.access_token}",
-        "User-Agent": "Mozilla/5.0 (Android 14; Mobile; rv:137.0) Gecko/137.0 Firefox/137.0"
-    }
+    url = "/v2.8/timeline"
 
     logger.info(f"Начинаю загрузку постов для пользователя {subsite_id}...")
-    async with httpx.AsyncClient() as client:
-        while True:
-            params = {
-                "subsitesIds": subsite_id,
-                "sorting": "new",
-                "markdown": "false",
-                "lastId": lastId,
-                "lastSortingValue": lastSortingValue,
-            }
-            try:
-                response = await client.get(url, headers=headers, params=params)
-                response.raise_for_status()
-                
-                result = response.json().get("result", {})
-                posts = result.get("items", [])
-                
-                if not posts:
-                    logger.info("Больше постов не найдено, завершаю загрузку.")
-                    break
-                
-                all_posts.extend(posts)
-                logger.info(f"Загружено {len(all_posts)} постов...")
+    while True:
+        params = {
+            "subsitesIds": subsite_id,
+            "sorting": "new",
+            "markdown": "false",
+            "lastId": lastId,
+            "lastSortingValue": lastSortingValue,
+        }
+        try:
+            response = await _api_request(token_manager, "GET", url, params=params)
+            response.raise_for_status()
+            
+            result = response.json().get("result", {})
+            posts = result.get("items", [])
 
-                # Обновляем значения для следующей итерации
-                lastId = result.get("lastId")
-                lastSortingValue = result.get("lastSortingValue")
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Ошибка при получении постов: {e.response.status_code} - {e.response.text}")
+            if strict:
+                raise
+            return
+        except Exception as e:
+            logger.error(f"Непредвиденная ошибка при загрузке постов: {e}", exc_info=True)
+            if strict:
+                raise
+            return
 
-            except httpx.HTTPStatusError as e:
-                logger.error(f"Ошибка при получении постов: {e.response.status_code} - {e.response.text}")
-                break
-            except Exception as e:
-                logger.error(f"Непредвиденная ошибка при загрузке постов: {e}", exc_info=True)
-                break
-                
+        if not posts:
+            logger.info("Больше постов не найдено, завершаю загрузку.")
+            return
+
+        loaded_count += len(posts)
+        logger.info(f"Загружено {loaded_count} постов...")
+        yield posts
+
+        # Обновляем значения для следующей итерации
+        lastId = result.get("lastId")
+        lastSortingValue = result.get("lastSortingValue")
+
+@dataclass(slots=True)
+class PostSummary:
+    """Проекция поста из ленты: только то, что нужно для выбора поста и поиска новых комментариев."""
+    id: int
+    title: str
+    date: int | None
+    comments: int | None  # Число комментариев по счетчику ленты; None - в ответе его нет
+
+    @classmethod
+    def from_api(cls, item: dict) -> "PostSummary | None":
+        # Элементы ленты имеют вид {"type": ..., "data": {...}}, сам пост лежит в "data"
+        data = item.get("data") or {}
+        if not data.get("id"):
+            return None
+        return cls(
+            id=data["id"],
+            title=data.get("title") or "Пост без заголовка",
+            date=data.get("date"),
+            comments=(data.get("counters") or {}).get("comments"),
+        )
+
+async def iter_subsite_post_ids(subsite_id: int, token_manager: TokenManager, strict: bool = False) -> AsyncIterator[int]:
+    """Отдает ID постов подсайта по мере загрузки страниц ленты (strict - как в iter_subsite_posts)."""
+    async for page in iter_subsite_posts(subsite_id, token_manager, strict=strict):
+        for post in page:
+            # Элементы ленты имеют вид {"type": ..., "data": {...}}, сам пост лежит в "data"
+            post_id = post.get("data", {}).get("id")
+            if post_id:
+                yield post_id
+
+async def get_subsite_posts(subsite_id: int, token_manager: TokenManager) -> list:
+    """
+    Получает список всех постов у подсайта/пользователя целиком.
+    :param subsite_id: ID подсайта/пользователя.
+    :param token_manager: Экземпляр TokenManager для управления токенами.
+    """
+    all_posts = []
+    async for page in iter_subsite_posts(subsite_id, token_manager):
+        all_posts.extend(page)
     return all_posts
 
-async def get_post_comments(post_id: int, token_manager: TokenManager) -> list:
-    """Получает список комментариев к посту.
+@dataclass(slots=True)
+class CommentRef:
+    """Проекция комментария: только поля, которые нужны логике удаления (без текста, медиа и вложенных объектов)."""
+    id: int
+    author_name: str
+    is_plus: bool | None  # None - в ответе API нет сведений о подписке автора
+    reply_to: int | None
+    date: int | None
+
+    @classmethod
+    def from_api(cls, data: dict) -> "CommentRef":
+        author = data.get("author") or {}
+        return cls(
+            id=data.get("id"),
+            author_name=author.get("name", "Неизвестный"),
+            is_plus=author.get("isPlus"),
+            reply_to=data.get("replyTo") or None,
+            date=data.get("date"),
+        )
+
+async def iter_post_comments(post_id: int, token_manager: TokenManager) -> AsyncIterator[list[CommentRef]]:
+    """Постранично загружает комментарии к посту, отдавая каждую страницу сразу по мере получения.
+    Если страницу получить не удалось (уже после повторов), бросает httpx.HTTPStatusError: молча оборванный
+    список выглядел бы как полностью проверенный пост.
     :param post_id: ID поста.
     :param token_manager: Экземпляр TokenManager для управления токенами.
     """
-    await token_manager.refresh()  # Убедимся, что токены актуальны
-    url = f"https://api.dtf.ru/v2.9/comments"
-    headers = {
-        "jwtauthorization": f"Bearer {token_manager.access_token}",
-        "User-Agent": "Mozilla/5.0 (Android 14; Mobile; rv:137.0) Gecko/137.0 Firefox/137.0"
-    }
+    url = "/v2.9/comments"
     params = {
         "contentId": post_id,
         "sorting": "date",
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            data = response.json().get("result", []).get("items", [])
-            logger.info(f"✅ Получено {len(data)} комментариев к посту {post_id}.")
-            return data
+    loaded_count = 0
+    while True:
+        response = await _api_request(token_manager, "GET", url, params=params)
+        if response.status_code != 200:
+            logger.error(f"❌ Ошибка при получении комментариев к посту {post_id}: {response.text}", extra={"post_id": post_id, "status": response.status_code})
+            raise httpx.HTTPStatusError(f"Комментарии к посту {post_id}: HTTP {response.status_code}", request=response.request, response=response)
+
+        result = response.json().get("result") or {}
+        page = [CommentRef.from_api(item) for item in result.pop("items", None) or []]
+        del response  # Сырое тело ответа и полные объекты комментариев больше не нужны
+        if not page:
+            break
+        loaded_count += len(page)
+        yield page
+
+        # Конец списка - явный признак (remainingCount/hasMore) или отсутствие нового курсора lastId.
+        # По короткой странице не останавливаемся: размер страницы задает сервер, и неполная страница не значит последняя
+        last_id = result.get("lastId")
+        if result.get("remainingCount") == 0 or result.get("hasMore") is False or not last_id or last_id == params.get("lastId"):
+            break
+        params["lastId"] = last_id
+        if result.get("lastSortingValue") is not None:
+            params["lastSortingValue"] = result["lastSortingValue"]
+
+    logger.info(f"✅ Получено {loaded_count} комментариев к посту {post_id}.", extra={"post_id": post_id})
+
+async def get_post_comments(post_id: int, token_manager: TokenManager) -> list[CommentRef]:
+    """Получает список всех комментариев к посту.
+    :param post_id: ID поста.
+    :param token_manager: Экземпляр TokenManager для управления токенами.
+    """
+    comments = []
+    async for page in iter_post_comments(post_id, token_manager):
+        comments.extend(page)
+    return comments
+
+async def get_comment(comment_id: int, token_manager: TokenManager) -> CommentRef | None:
+    """Получает один комментарий по его ID.
+    :param comment_id: ID комментария.
+    :param token_manager: Экземпляр TokenManager для управления токенами.
+    """
+    url = f"/v3.0/comments/{comment_id}"
+
+    response = await _api_request(token_manager, "GET", url)
+    if response.status_code == 200:
+        data = response.json().get("result")
+        if isinstance(data, dict):
+            data.setdefault("id", comment_id)
+            return CommentRef.from_api(data)
+        logger.warning(f"⚠️ Неожиданный формат ответа для комментария {comment_id}.")
+    else:
+        logger.warning(f"⚠️ Не удалось получить комментарий {comment_id}: {response.status_code}")
+    return None
+
+@dataclass
+class PostSweepResult:
+    """Итог обработки одного поста."""
+    post_id: int
+    deleted: int = 0  # Удалены комментарии Plus-пользователей
+    failed: int = 0  # Plus-комментарии, которые не удалось удалить
+    skipped: int = 0  # Комментарии обычных пользователей
+    error: str | None = None  # Ошибка, из-за которой пост не был обработан
+    comment_errors: dict[int, str] = field(default_factory=dict)  # ID комментария -> этап с ошибкой ('reply' или 'delete')
+    cancelled: bool = False  # Обработка поста прервана отменой, часть комментариев не проверена
+
+@dataclass
+class SweepResult:
+    """Суммарный итог очистки по всем обработанным постам."""
+    posts: list[PostSweepResult] = field(default_factory=list)
+    cancelled: bool = False  # Очистка остановлена через CancellationToken до обработки всех постов
+
+    @property
+    def deleted(self) -> int:
+        return sum(post.deleted for post in self.posts)
+
+    @property
+    def failed(self) -> int:
+        return sum(post.failed for post in self.posts)
+
+    @property
+    def skipped(self) -> int:
+        return sum(post.skipped for post in self.posts)
+
+    @property
+    def failed_posts(self) -> list[PostSweepResult]:
+        return [post for post in self.posts if post.error is not None]
+
+DEFAULT_MAX_CONCURRENT_POSTS = 4
+DEFAULT_MAX_CONCURRENT_COMMENTS = 4
+MAX_DELETE_ATTEMPTS = 5  # После стольких неудачных попыток удаления (по scan_index) комментарий больше не трогаем
+
+# Один пост одновременно проверяет только одна задача процесса (watcher, догоняющая проверка, ActivityPoller, GUI):
+# вторая дождется первой и увидит ее отметки в scan_index, а не ответит тому же автору повторно
+_post_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def _post_lock(post_id: int) -> asyncio.Lock:
+    lock = _post_locks.get(post_id)
+    if lock is None:
+        lock = _post_locks[post_id] = asyncio.Lock()
+    return lock
+
+PROGRESS_MIN_INTERVAL = 0.2  # Не чаще одного события прогресса за столько секунд (кроме финального)
+
+class CancellationToken:
+    """
+    Флаг остановки долгой очистки. cancel() можно вызывать из любого потока (например, из GUI).
+    Очистка проверяет флаг между запросами: новые посты и пары «ответ -> удаление» не начинаются,
+    уже начатые доводятся до конца.
+    """
+
+    def __init__(self):
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+@dataclass
+class SweepProgress:
+    """Снимок хода очистки, который получает обработчик прогресса."""
+    posts_found: int = 0  # ID постов, уже полученных из ленты
+    posts_scanned: int = 0
+    comments_inspected: int = 0  # Новые (еще не проверенные ранее) комментарии
+    deleted: int = 0
+    failed: int = 0
+    feed_complete: bool = False  # Лента загружена целиком, posts_found - итоговое число постов
+    elapsed: float = 0.0
+    eta: float | None = None  # Оценка оставшегося времени, с; None - пока не известна
+    finished: bool = False
+    cancelled: bool = False
+
+ProgressCallback = Callable[[SweepProgress], Awaitable[None]]
+
+class ProgressReporter:
+    """Копит счетчики прогресса и передает их снимки в async-обработчик не чаще раза в min_interval секунд."""
+
+    def __init__(self, callback: ProgressCallback, min_interval: float = PROGRESS_MIN_INTERVAL):
+        self.callback = callback
+        self.min_interval = min_interval
+        self.progress = SweepProgress()
+        self._started = time.monotonic()
+        self._last_emit = 0.0
+
+    async def update(self, force: bool = False, **deltas: int) -> None:
+        for name, delta in deltas.items():
+            setattr(self.progress, name, getattr(self.progress, name) + delta)
+        now = time.monotonic()
+        if not force and now - self._last_emit < self.min_interval:
+            return
+        self._last_emit = now
+
+        progress = self.progress
+        progress.elapsed = now - self._started
+        if progress.feed_complete and progress.posts_scanned:
+            remaining = progress.posts_found - progress.posts_scanned
+            progress.eta = progress.elapsed / progress.posts_scanned * remaining
+        # Обработчику отдаем копию: он может читать ее из другого потока, пока очистка идет дальше
+        await self.callback(replace(progress))
+
+    async def finish(self, cancelled: bool) -> None:
+        self.progress.finished = True
+        self.progress.cancelled = cancelled
+        self.progress.eta = 0.0 if not cancelled else None
+        await self.update(force=True)
+
+async def sweep_posts(post_ids: Iterable[int] | AsyncIterable[int], token_manager: TokenManager, max_concurrent_posts: int = DEFAULT_MAX_CONCURRENT_POSTS, scan_index: ScanIndex | None = None, reply: bool = True, progress: ProgressReporter | None = None, cancel_token: CancellationToken | None = None, journal: SweepJournal | None = None) -> SweepResult:
+    """
+    Параллельно очищает несколько постов, держа в работе не больше max_concurrent_posts одновременно.
+    ID постов могут приходить из асинхронного итератора: обработка первых постов начинается,
+    пока следующие страницы ленты еще загружаются.
+    Ошибка в одном посте не прерывает обработку остальных.
+    Общее число одновременных HTTP-запросов ограничивается DtfClient (max_concurrent_requests).
+    С journal посты, завершенные в прошлом (прерванном) запуске, пропускаются, а полностью
+    обработанные без ошибок - записываются в журнал.
+    """
+    post_slots = asyncio.Semaphore(max_concurrent_posts)
+
+    async def process(post_id: int) -> PostSweepResult:
+        try:
+            result = await delete_all_comments_from_post(post_id, token_manager, scan_index, reply=reply, progress=progress, cancel_token=cancel_token, journal=journal)
+            # Пост отмечается в журнале, только если его комментарии загружены целиком и все Plus-комментарии удалены
+            if journal and result.error is None and not result.failed and not result.cancelled:
+                journal.post_done(post_id)
+            return result
+        except Exception as e:
+            logger.error(f"❌ Ошибка при обработке поста {post_id}: {e}", exc_info=True, extra={"post_id": post_id})
+            return PostSweepResult(post_id, error=str(e))
+        finally:
+            post_slots.release()
+            if progress:
+                await progress.update(posts_scanned=1)
+
+    tasks = []
+    cancelled = False
+    try:
+        async for post_id in _as_async_iterator(post_ids):
+            if journal and journal.is_post_done(post_id):
+                continue
+            # Не забираем следующий ID, пока нет свободного слота: так загрузка ленты не убегает далеко вперед
+            await post_slots.acquire()
+            if cancel_token and cancel_token.cancelled:
+                post_slots.release()
+                cancelled = True
+                break
+            if progress:
+                await progress.update(posts_found=1)
+            tasks.append(asyncio.create_task(process(post_id)))
         else:
-            logger.error(f"❌ Ошибка при получении комментариев к посту {post_id}: {response.text}")
-            return []
+            if progress:
+                progress.progress.feed_complete = True
+    finally:
+        results = await asyncio.gather(*tasks)
+    cancelled = cancelled or bool(cancel_token and cancel_token.cancelled)
+    if progress:
+        await progress.finish(cancelled)
+    return SweepResult(posts=list(results), cancelled=cancelled)
+
+async def sweep_active_posts(subsite_id: int, token_manager: TokenManager, scan_index: ScanIndex, since: float | None, max_pages: int | None = None, max_concurrent_posts: int = DEFAULT_MAX_CONCURRENT_POSTS, reply: bool = True) -> SweepResult:
+    """
+    Проверяет только посты, в которых изменилось число комментариев с прошлой проверки (по счетчикам ленты),
+    и только новые комментарии в них (см. scan_index). Посты с большим приростом комментариев и более свежие
+    проверяются первыми. Используется догоняющей проверкой watcher и ActivityPoller.
+    :param since: С какого момента могли появиться непроверенные комментарии. Посты, которых еще нет в индексе,
+        проверяются, только если опубликованы после since; остальные (и все при since=None) только запоминаются.
+    :param max_pages: Сколько страниц ленты (самых новых постов) просмотреть; None - всю ленту.
+    """
+    counts: dict[int, int] = {}
+    changed: list[tuple[int, int, int]] = []  # (прирост комментариев, дата, ID поста)
+    pages = 0
+    async for page in iter_subsite_posts(subsite_id, token_manager):
+        page_posts = [post for post in map(PostSummary.from_api, page) if post and post.comments is not None]
+        known = scan_index.comment_counts(post.id for post in page_posts)
+        for post in page_posts:
+            counts[post.id] = post.comments
+            previous = known.get(post.id)
+            if previous is None:
+                if since is not None and post.comments and (post.date or 0) >= since:
+                    changed.append((post.comments, post.date or 0, post.id))
+            elif previous != post.comments:
+                changed.append((max(post.comments - previous, 0), post.date or 0, post.id))
+        pages += 1
+        if max_pages is not None and pages >= max_pages:
+            break
+
+    changed.sort(reverse=True)
+    result = await sweep_posts([post_id for _, _, post_id in changed], token_manager, max_concurrent_posts, scan_index, reply)
+    # Счетчики постов с ошибками не запоминаем: при следующей проверке они снова попадут в работу
+    unfinished = {post.post_id for post in result.posts if post.failed or post.error or post.cancelled}
+    scan_index.record_comment_counts({post_id: count for post_id, count in counts.items() if post_id not in unfinished})
+    return result
+
+async def _as_async_iterator(items: Iterable | AsyncIterable) -> AsyncIterator:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
 
-async def find_and_delete_plus_users_comments(type: Literal['all_posts', 'one_post'], post_id: int | None, subsite_id: int | None, token_manager: TokenManager) -> int:
+async def find_and_delete_plus_users_comments(type: Literal['all_posts', 'one_post'], post_id: int | None, subsite_id: int | None, token_manager: TokenManager, max_concurrent_posts: int = DEFAULT_MAX_CONCURRENT_POSTS, scan_index: ScanIndex | None = None, reply: bool = True, on_progress: ProgressCallback | None = None, cancel_token: CancellationToken | None = None, journal: SweepJournal | None = None, resume: bool = False) -> SweepResult:
     """
     Ищет комментарии пользователей с подпиской Plus, после чего удаляем их.
     :param type: Тип поиска комментариев ('all_posts' для всех постов или 'one_post' для одного поста).
     :param post_id: ID поста, если type='one_post'.
     :param subsite_id: ID подсайта, если type='all_posts'.
     :param token_manager: Экземпляр TokenManager для управления токенами.
+    :param max_concurrent_posts: Сколько постов обрабатывать одновременно при type='all_posts'.
+    :param scan_index: Индекс уже проверенных комментариев; если передан, проверяются только новые комментарии.
+    :param reply: Отвечать ли автору перед удалением; False - только удаление, максимальная скорость.
+    :param on_progress: async-обработчик, получающий SweepProgress по ходу очистки (не чаще раза в PROGRESS_MIN_INTERVAL с).
+    :param cancel_token: Токен отмены; после cancel() новые запросы не начинаются, результат помечается cancelled.
+    :param journal: Журнал для type='all_posts'; позволяет продолжить очистку после сбоя или отмены.
+    :param resume: Продолжить незавершенную очистку из journal вместо того, чтобы начать заново.
     """
+    progress = ProgressReporter(on_progress) if on_progress else None
     if (type == 'all_posts' and subsite_id is None) or (type == 'one_post' and post_id is None):
         logger.error("❌ Ошибка: Не указаны необходимые параметры для поиска комментариев.")
-        return
-    
-    plus_comment_deleted_count = 0
+        return SweepResult()
 
     match type:
         case 'all_posts':
             logger.info("🔍 Поиск комментариев от Plus-пользователей во всех постах...")
-            posts = await get_subsite_posts(subsite_id, token_manager=token_manager)
-            for post in posts:
-                post_id = post.get("id")
-                plus_comment_deleted_count += await delete_all_comments_from_post(post_id,token_manager)
-            return plus_comment_deleted_count
+            # С журналом сбой загрузки ленты должен прервать очистку: иначе недогруженная лента записалась бы как завершенная
+            post_ids = iter_subsite_post_ids(subsite_id, token_manager, strict=journal is not None)
+            if journal:
+                journal.begin(subsite_id, resume)
+            try:
+                if journal and journal.state.pending_deletes:
+                    await _retry_pending_deletes(journal, token_manager, scan_index, cancel_token)
+                result = await sweep_posts(post_ids, token_manager, max_concurrent_posts, scan_index, reply, progress, cancel_token, journal)
+                # Прерванную или неполную очистку можно будет продолжить
+                if journal and not result.cancelled and not result.failed and not result.failed_posts:
+                    journal.finish()
+            finally:
+                if journal:
+                    journal.close()
+            if result.cancelled:
+                logger.info("⏹️ Очистка остановлена пользователем.")
+            logger.info(f"🏁 Обработано постов: {len(result.posts)}, удалено: {result.deleted}, ошибок удаления: {result.failed}, постов с ошибками: {len(result.failed_posts)}.")
+            return result
 
         case 'one_post':
             logger.info(f"🔍 Поиск комментариев от Plus-пользователей в посте {post_id}...")
-            return await delete_all_comments_from_post(post_id,token_manager)
+            return await sweep_posts([post_id], token_manager, max_concurrent_posts=1, scan_index=scan_index, reply=reply, progress=progress, cancel_token=cancel_token)
 
         case _:
             logger.error("❌ Ошибка: Неверный тип поиска комментариев. Используйте 'all_posts' или 'one_post'.")
-            return -1
-
-async def delete_all_comments_from_post(post_id: int, token_manager: TokenManager) -> int:
-    comment_deleted_count = 0
-    comments = await get_post_comments(post_id, token_manager)
-    for comment in comments:
-        user_plus_status = comment.get("author", {}).get("isPlus")
-        username = comment.get("author", {}).get("name", "Неизвестный")
-        if user_plus_status:
-            await send_comment(post_id, comment.get("id"), f"{username}, здесь богатеям с подпиской Plus не рады! Отмени свою подписку - тогда поговорим. \n AntiDTFPlus - 'Сейчас запрещу людям с подпиской Plus писать под моими постами, так Комитет сразу все бесплатные функции вернет...'", token_manager)
-            await delete_comment(comment.get("id"), withThread=False, token_manager=token_manager)
-            comment_deleted_count += 1
-    return comment_deleted_count
\ No newline at end of file
+            return SweepResult()
+
+async def _retry_pending_deletes(journal: SweepJournal, token_manager: TokenManager, scan_index: ScanIndex | None, cancel_token: CancellationToken | None = None) -> None:
+    """
+    Повторяет удаления, начатые прерванным запуском, итог которых неизвестен (ответ автору к этому моменту уже ушел).
+    Комментарии уже проверены как Plus, так что их достаточно удалить; 404 означает, что удаление тогда прошло.
+    Если повторить не удалось, комментарий проверит обычная очистка: его пост не отмечен в журнале завершенным.
+    """
+    pending = list(journal.state.pending_deletes.items())
+    logger.info(f"📒 Повторяю незавершенные удаления: {len(pending)}.")
+
+    async def retry(comment_id: int, post_id: int) -> bool:
+        if cancel_token and cancel_token.cancelled:
+            return False
+        journal.action('delete', post_id, comment_id, 'issued')
+        ok = await delete_comment(comment_id, withThread=False, token_manager=token_manager)
+        journal.action('delete', post_id, comment_id, 'done' if ok else 'failed')
+        if ok:
+            metrics.COMMENTS_DELETED.inc(account=token_manager.account)
+            if scan_index:
+                scan_index.mark_acted(post_id, comment_id)
+        return ok
+
+    outcomes = await asyncio.gather(*(retry(comment_id, post_id) for comment_id, post_id in pending), return_exceptions=True)
+    failed = sum(1 for ok in outcomes if ok is not True)
+    if failed:
+        logger.warning(f"⚠️ Не удалось повторить удалений: {failed}.")
+
+def _plus_reply_text(username: str) -> str:
+    return f"{username}, здесь богатеям с подпиской Plus не рады! Отмени свою подписку - тогда поговорим. \n AntiDTFPlus - 'Сейчас запрещу людям с подпиской Plus писать под моими постами, так Комитет сразу все бесплатные функции вернет...'"
+
+async def _process_comment(post_id: int, comment: CommentRef, token_manager: TokenManager, scan_index: ScanIndex | None, result: PostSweepResult, reply: bool = True, journal: SweepJournal | None = None) -> bool:
+    """
+    Проверяет один комментарий и, если автор с подпиской Plus, отвечает ему и удаляет комментарий.
+    Ответ всегда отправляется (и дожидается) до удаления, иначе отвечать было бы уже не на что.
+    Если ответ уже отправлен прошлым проходом (scan_index) или мог быть отправлен прерванным запуском (journal),
+    повторно не отвечаем: иначе комментарий, который раз за разом не удаляется, получал бы ответ при каждой проверке.
+    Возвращает False, если удалить Plus-комментарий не удалось.
+    """
+    comment_id = comment.id
+    if not comment.is_plus:
+        result.skipped += 1
+        return True
+
+    already_replied = (journal and journal.was_replied(comment_id)) or (scan_index and scan_index.was_replied(comment_id))
+    if reply and not already_replied:
+        if journal:
+            journal.action('reply', post_id, comment_id, 'issued')
+        reply_id = await send_comment(post_id, comment_id, _plus_reply_text(comment.author_name), token_manager)
+        if reply_id == -1:
+            result.comment_errors[comment_id] = 'reply'
+            metrics.COMMENT_FAILURES.inc(stage='reply', account=token_manager.account)
+        else:
+            metrics.REPLIES_SENT.inc(account=token_manager.account)
+            if scan_index:
+                scan_index.mark_replied(post_id, comment_id)
+        if journal:
+            journal.action('reply', post_id, comment_id, 'failed' if reply_id == -1 else 'done')
+    if journal:
+        journal.action('delete', post_id, comment_id, 'issued')
+    if await delete_comment(comment_id, withThread=False, token_manager=token_manager):
+        result.deleted += 1
+        metrics.COMMENTS_DELETED.inc(account=token_manager.account)
+        if scan_index:
+            scan_index.mark_acted(post_id, comment_id)
+        if journal:
+            journal.action('delete', post_id, comment_id, 'done')
+        return True
+    if journal:
+        journal.action('delete', post_id, comment_id, 'failed')
+    result.failed += 1
+    result.comment_errors[comment_id] = 'delete'
+    metrics.COMMENT_FAILURES.inc(stage='delete', account=token_manager.account)
+    if scan_index and scan_index.record_delete_failure(post_id, comment_id) >= MAX_DELETE_ATTEMPTS:
+        logger.warning(f"⚠️ Комментарий {comment_id} не удалось удалить {MAX_DELETE_ATTEMPTS} раз, больше не пытаюсь.", extra={"post_id": post_id, "comment_id": comment_id})
+    return False
+
+async def handle_single_comment(post_id: int, comment_id: int, token_manager: TokenManager, scan_index: ScanIndex | None = None, reply: bool = True) -> PostSweepResult | None:
+    """
+    Быстрый путь для одного комментария: проверяет только его автора, не скачивая все комментарии поста.
+    Возвращает None, если решить по одному комментарию не удалось (нет данных об авторе) -
+    тогда вызывающий должен проверить пост целиком.
+    """
+    result = PostSweepResult(post_id)
+    async with _post_lock(post_id):
+        if scan_index and comment_id in scan_index.acted_comment_ids(post_id) | scan_index.abandoned_comment_ids(post_id, MAX_DELETE_ATTEMPTS):
+            return result
+
+        comment = await get_comment(comment_id, token_manager)
+        if comment is None or comment.is_plus is None:
+            return None
+
+        await _process_comment(post_id, comment, token_manager, scan_index, result, reply)
+    return result
+
+async def delete_all_comments_from_post(post_id: int, token_manager: TokenManager, scan_index: ScanIndex | None = None, reply: bool = True, max_concurrent_comments: int = DEFAULT_MAX_CONCURRENT_COMMENTS, progress: ProgressReporter | None = None, cancel_token: CancellationToken | None = None, journal: SweepJournal | None = None) -> PostSweepResult:
+    """
+    Удаляет Plus-комментарии поста. Пары «ответ -> удаление» для разных комментариев выполняются параллельно
+    (не больше max_concurrent_comments одновременно), порядок внутри пары сохраняется.
+    После отмены через cancel_token новые страницы и пары не начинаются; отметка в scan_index
+    не сдвигается дальше необработанных комментариев.
+    Пока пост проверяется, другие проверки того же поста в этом процессе ждут (см. _post_lock).
+    """
+    async with _post_lock(post_id):
+        result = PostSweepResult(post_id)
+        last_checked_id = scan_index.last_comment_id(post_id) if scan_index else 0
+        # Обработанные комментарии и те, что так и не удалось удалить за MAX_DELETE_ATTEMPTS попыток, пропускаем
+        acted_ids = scan_index.acted_comment_ids(post_id) | scan_index.abandoned_comment_ids(post_id, MAX_DELETE_ATTEMPTS) if scan_index else set()
+        comment_slots = asyncio.Semaphore(max_concurrent_comments)
+
+        async def process(comment: CommentRef) -> bool:
+            async with comment_slots:
+                if cancel_token and cancel_token.cancelled:
+                    result.cancelled = True
+                    return False  # Пара не начата; как и при ошибке, следующий проход проверит комментарий снова
+                try:
+                    ok = await _process_comment(post_id, comment, token_manager, scan_index, result, reply, journal)
+                except Exception as e:
+                    logger.error(f"❌ Ошибка при обработке комментария {comment.id} в посте {post_id}: {e}", exc_info=True, extra={"post_id": post_id, "comment_id": comment.id})
+                    result.failed += 1
+                    result.comment_errors[comment.id] = 'delete'
+                    metrics.COMMENT_FAILURES.inc(stage='delete', account=token_manager.account)
+                    ok = False
+            if progress:
+                await progress.update(deleted=int(ok), failed=int(not ok))
+            return ok
+
+        newest_id, newest_date = last_checked_id, None
+        tasks: dict[int, asyncio.Task] = {}
+        seen_ids: set[int] = set()  # Страницы по курсору могут перекрываться - один комментарий обрабатываем один раз
+        try:
+            async for page in iter_post_comments(post_id, token_manager):
+                if cancel_token and cancel_token.cancelled:
+                    result.cancelled = True
+                    break
+                inspected = 0
+                for comment in page:
+                    comment_id = comment.id
+                    if comment_id is None or comment_id <= last_checked_id or comment_id in acted_ids:
+                        continue  # Уже проверен в одном из прошлых проходов
+                    if comment_id in seen_ids:
+                        continue  # Уже встречался на предыдущей странице этого прохода
+                    seen_ids.add(comment_id)
+                    inspected += 1
+                    if comment_id > newest_id:
+                        newest_id, newest_date = comment_id, comment.date
+
+                    if comment.is_plus:
+                        tasks[comment_id] = asyncio.create_task(process(comment))
+                    else:
+                        result.skipped += 1
+                if progress:
+                    await progress.update(comments_inspected=inspected)
+        finally:
+            # Даже если загрузка комментариев оборвалась, уже начатые удаления нужно дождаться
+            outcomes = await asyncio.gather(*tasks.values())
+
+        if scan_index and newest_id > last_checked_id:
+            # Отметку не сдвигаем дальше неудаленного комментария, чтобы следующий проход попробовал снова
+            failed_ids = [comment_id for comment_id, ok in zip(tasks, outcomes) if not ok]
+            if failed_ids:
+                newest_id, newest_date = min(failed_ids) - 1, None
+            scan_index.record_scan(post_id, newest_id, newest_date)
+        return result
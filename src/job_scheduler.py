@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field, replace
+from typing import Callable
+
+from .dtf_api import (DEFAULT_MAX_CONCURRENT_POSTS, CancellationToken, PostSummary, PostSweepResult, ProgressReporter,
+                      SweepProgress, TokenManager, delete_all_comments_from_post)
+from .scan_index import ScanIndex
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"  # Пост не обработан или часть Plus-комментариев не удалось удалить
+JOB_CANCELLED = "cancelled"
+
+@dataclass
+class CleanupJob:
+    """Очистка одного поста в JobScheduler."""
+    post_id: int
+    title: str
+    status: str = JOB_QUEUED
+    deleted: int = 0
+    failed: int = 0
+    error: str | None = None  # Ошибка, из-за которой пост не был обработан
+    cancel_token: CancellationToken = field(default_factory=CancellationToken, repr=False, compare=False)
+
+    @property
+    def active(self) -> bool:
+        return self.status in (JOB_QUEUED, JOB_RUNNING)
+
+JobCallback = Callable[[CleanupJob], None]
+
+class JobScheduler:
+    """
+    Фоновые задачи очистки отдельных постов для GUI: пакет постов добавляется одним действием,
+    посты, которые уже стоят в очереди или обрабатываются, повторно не добавляются.
+    Одновременно обрабатывается не больше max_concurrent постов на все пакеты сразу, остальные ждут в очереди.
+    Живет в общем фоновом event loop: submit() вызывается через App.run_async, а on_update получает
+    копии задач в потоке event loop (передать их в поток Tk - дело обработчика).
+    """
+
+    def __init__(self, token_manager: TokenManager, scan_index: ScanIndex | None = None, max_concurrent: int = DEFAULT_MAX_CONCURRENT_POSTS, reply: bool = True, on_update: JobCallback | None = None):
+        self.token_manager = token_manager
+        self.scan_index = scan_index
+        self.reply = reply
+        self.on_update = on_update
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._active: dict[int, CleanupJob] = {}  # ID поста -> задача в очереди или в работе
+        self._tasks: dict[int, asyncio.Task] = {}  # ID поста -> asyncio-задача активной очистки
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def submit(self, posts: list[PostSummary]) -> list[CleanupJob]:
+        """Ставит посты в очередь. Возвращает копии новых задач; посты, которые уже в работе, пропускаются."""
+        self._loop = asyncio.get_running_loop()
+        jobs = []
+        for post in posts:
+            if post.id in self._active:
+                continue
+            job = self._active[post.id] = CleanupJob(post.id, post.title)
+            jobs.append(job)
+            self._notify(job)
+            self._tasks[post.id] = asyncio.create_task(self._run(job))
+        if jobs:
+            logger.info(f"🗂️ В очередь очистки добавлено постов: {len(jobs)}, уже в работе: {len(posts) - len(jobs)}.")
+        return [replace(job) for job in jobs]
+
+    def cancel(self, post_ids: set[int] | None = None) -> None:
+        """
+        Отменяет задачи постов post_ids (None - все). Задачи из очереди снимаются сразу, не дожидаясь
+        свободного слота; у начатых новые пары «ответ -> удаление» не начинаются.
+        Потокобезопасно: сама отмена выполняется в потоке event loop, где меняется и список задач.
+        """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._cancel, post_ids)
+
+    def _cancel(self, post_ids: set[int] | None):
+        for job in list(self._active.values()):
+            if post_ids is not None and job.post_id not in post_ids:
+                continue
+            job.cancel_token.cancel()
+            # Задача из очереди ждет слот - прерываем ожидание; начатую не трогаем, ее остановит cancel_token
+            task = self._tasks.get(job.post_id)
+            if job.status == JOB_QUEUED and task is not None:
+                task.cancel()
+
+    @property
+    def active_count(self) -> int:
+        return len(self._active)
+
+    async def _run(self, job: CleanupJob):
+        try:
+            if job.cancel_token.cancelled:
+                job.status = JOB_CANCELLED
+                return
+            async with self._slots:
+                # Пока задача ждала слот, ее могли отменить
+                if job.cancel_token.cancelled:
+                    job.status = JOB_CANCELLED
+                    return
+                job.status = JOB_RUNNING
+                self._notify(job)
+
+                async def on_progress(progress: SweepProgress):
+                    job.deleted, job.failed = progress.deleted, progress.failed
+                    self._notify(job)
+
+                result: PostSweepResult = await delete_all_comments_from_post(
+                    job.post_id, self.token_manager, self.scan_index, reply=self.reply,
+                    progress=ProgressReporter(on_progress), cancel_token=job.cancel_token,
+                )
+                job.deleted, job.failed = result.deleted, result.failed
+                if result.cancelled:
+                    job.status = JOB_CANCELLED
+                else:
+                    job.status = JOB_FAILED if result.failed else JOB_DONE
+        except asyncio.CancelledError:
+            job.status = JOB_CANCELLED
+            raise
+        except Exception as e:
+            logger.error(f"❌ Ошибка при обработке поста {job.post_id}: {e}", exc_info=True, extra={"post_id": job.post_id})
+            job.status, job.error = JOB_FAILED, str(e)
+        finally:
+            self._active.pop(job.post_id, None)
+            self._tasks.pop(job.post_id, None)
+            self._notify(job)
+
+    def _notify(self, job: CleanupJob):
+        if self.on_update is None:
+            return
+        try:
+            # Обработчику отдаем копию: он может читать ее из другого потока, пока задача идет дальше
+            self.on_update(replace(job))
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка обработчика состояния задачи: {e}")
@@ -1,20 +1,164 @@
+import atexit
+import contextvars
+import json
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 
-def setup_logging():
+LOG_MAX_BYTES = 5 * 1024 * 1024  # Размер файла лога, после которого он ротируется
+LOG_BACKUP_COUNT = 3  # Сколько старых файлов хранить (service.log.1 ... service.log.3)
+
+# Сторонние библиотеки по умолчанию пишут только предупреждения: socketio/engineio логируют каждый пакет
+DEFAULT_LIBRARY_LEVELS = {
+    "socketio": logging.WARNING,
+    "engineio": logging.WARNING,
+    "httpx": logging.WARNING,
+    "httpcore": logging.WARNING,
+    "aiohttp": logging.WARNING,
+}
+
+# Поля операций, которые можно передать через extra={...} и которые попадают в JSON-лог отдельными ключами
+OPERATION_FIELDS = ("post_id", "comment_id", "latency", "method", "url", "status", "attempt", "account")
+
+# Аккаунт, от имени которого работает текущая задача asyncio (многоаккаунтная служба).
+# Задачи наследуют значение от создавшей их задачи, поэтому его достаточно задать один раз на аккаунт.
+current_account: contextvars.ContextVar[str | None] = contextvars.ContextVar("current_account", default=None)
+
+_listener: logging.handlers.QueueListener | None = None
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-запись на строку: время, уровень, логгер, сообщение и поля операции."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for name in OPERATION_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                data[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Обычный текстовый формат; сообщения, записанные от имени аккаунта, помечаются [аккаунт]."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(account_tag)s%(message)s')
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        account = getattr(record, "account", None)
+        record.account_tag = f"[{account}] " if account is not None else ""
+        return super().formatMessage(record)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, который не склеивает сообщение заранее: форматирование (в том числе JSON с полями
+    операции и трейсбеком) выполняют обработчики в потоке QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Контекст задачи доступен только в потоке, который пишет запись, - в потоке QueueListener его уже нет
+        if getattr(record, "account", None) is None:
+            record.account = current_account.get()
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            # Трейсбек форматируем здесь: объект исключения не должен жить в очереди
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def _level_value(text: str) -> int | None:
+    """Уровень логирования по имени ("DEBUG") или числу ("10"); None, если такого уровня нет."""
+    text = text.strip().upper()
+    if text.isdigit():
+        return int(text)
+    level = logging.getLevelName(text)
+    # Для неизвестного имени getLevelName возвращает строку "Level X", а не число
+    return level if isinstance(level, int) else None
+
+def _parse_levels(spec: str) -> tuple[dict[str, int], list[str]]:
+    """Разбирает строку вида "socketio=INFO,httpx=DEBUG". Возвращает уровни и нераспознанные элементы."""
+    levels, invalid = {}, []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        value = _level_value(level)
+        if not name.strip() or value is None:
+            invalid.append(item)
+            continue
+        levels[name.strip()] = value
+    return levels, invalid
+
+def setup_logging(log_name: str | None = None, json_format: bool | None = None, level: str | int | None = None, library_levels: dict[str, int] | None = None):
+    """
+    Настраивает неблокирующее логирование: все логгеры пишут в очередь, а файл и консоль обслуживает
+    отдельный поток QueueListener. Файл ротируется по размеру.
+    Повторный вызов без аргументов ничего не делает (модули вызывают его при импорте).
+
+    Параметры можно задать и переменными окружения:
+    ANTIDTFPLUS_LOG_LEVEL=DEBUG, ANTIDTFPLUS_LOG_JSON=1, ANTIDTFPLUS_LOG_LEVELS="socketio=INFO,httpx=DEBUG".
+    """
+    global _listener
+    explicit = any(value is not None for value in (log_name, json_format, level, library_levels))
+    if _listener is not None:
+        if not explicit:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    else:
+        atexit.register(_stop_listener)
+
     APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".antidtfplus")
     os.makedirs(APP_DATA_DIR, exist_ok=True)
 
-    log_filename = "service.log" if "auto_service.py" in sys.argv[0] else "app.log"
-    log_file_path = os.path.join(APP_DATA_DIR, log_filename)
-
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file_path, encoding='utf-8'),
-            logging.StreamHandler()
-        ],
-        force=True
-    )
\ No newline at end of file
+    if log_name is None:
+        # run_service.py, auto_service.py и собранный AntiDTFPlusServiceHandler.exe пишут в service.log
+        log_name = "service.log" if "service" in os.path.basename(sys.argv[0]).lower() else "app.log"
+    log_file_path = os.path.join(APP_DATA_DIR, log_name)
+
+    if json_format is None:
+        json_format = os.environ.get("ANTIDTFPLUS_LOG_JSON", "") not in ("", "0")
+    # Опечатка в переменных окружения не должна ронять GUI и службу при старте: неверные значения пропускаем
+    invalid = []
+    if level is None:
+        env_level = os.environ.get("ANTIDTFPLUS_LOG_LEVEL", "INFO")
+        level = _level_value(env_level)
+        if level is None:
+            invalid.append(f"ANTIDTFPLUS_LOG_LEVEL={env_level}")
+            level = logging.INFO
+    env_levels, invalid_levels = _parse_levels(os.environ.get("ANTIDTFPLUS_LOG_LEVELS", ""))
+    invalid += [f"ANTIDTFPLUS_LOG_LEVELS: {item}" for item in invalid_levels]
+    levels = {**DEFAULT_LIBRARY_LEVELS, **env_levels, **(library_levels or {})}
+
+    formatter = JsonFormatter() if json_format else TextFormatter()
+    file_handler = logging.handlers.RotatingFileHandler(log_file_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    logging.basicConfig(level=level, handlers=[_QueueHandler(log_queue)], force=True)
+    for name, library_level in levels.items():
+        logging.getLogger(name).setLevel(library_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    for item in invalid:
+        logging.getLogger(__name__).warning(f"⚠️ Неизвестный уровень логирования, пропускаю: {item}")
+
+def _stop_listener():
+    """Дописывает оставшиеся в очереди записи при завершении процесса."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
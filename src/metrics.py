@@ -0,0 +1,256 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".antidtfplus")
+METRICS_SNAPSHOT_FILE = os.path.join(APP_DATA_DIR, "metrics.json")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _escape_label_value(value: str) -> str:
+    """Экранирование значения метки по формату Prometheus: обратная косая черта, перевод строки и кавычка."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+class Counter:
+    """Монотонно растущий счетчик с метками."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: dict[tuple, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        self.values[_label_key(labels)] += amount
+
+    def total(self) -> float:
+        return sum(self.values.values())
+
+    def totals_by(self, label: str) -> dict[str, float]:
+        """Суммы по значениям одной метки (например, по аккаунтам); значения без метки не учитываются."""
+        totals: dict[str, float] = defaultdict(float)
+        for key, value in self.values.items():
+            labels = dict(key)
+            if label in labels:
+                totals[labels[label]] += value
+        return dict(totals)
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{_format_labels(key)} {value:g}" for key, value in self.values.items()]
+
+    def snapshot(self) -> list[dict]:
+        return [{"labels": dict(key), "value": value} for key, value in self.values.items()]
+
+class Gauge:
+    """Текущее значение; может вычисляться функцией в момент чтения."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: dict[tuple, float] = {}
+        self.functions: dict[tuple, callable] = {}
+
+    def set(self, value: float, **labels) -> None:
+        self.values[_label_key(labels)] = value
+
+    def set_function(self, function, **labels) -> None:
+        self.functions[_label_key(labels)] = function
+
+    def _current(self) -> dict[tuple, float]:
+        current = dict(self.values)
+        for key, function in self.functions.items():
+            current[key] = function()
+        return current
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{_format_labels(key)} {value:g}" for key, value in self._current().items()]
+
+    def snapshot(self) -> list[dict]:
+        return [{"labels": dict(key), "value": value} for key, value in self._current().items()]
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин (секунды)."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.counts: dict[tuple, list[int]] = {}
+        self.sums: dict[tuple, float] = defaultdict(float)
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        counts = self.counts.setdefault(key, [0] * (len(self.buckets) + 1))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+        self.sums[key] += value
+
+    def quantile(self, key: tuple, q: float) -> float:
+        """Оценка квантиля по верхней границе корзины."""
+        counts = self.counts[key]
+        target = q * sum(counts)
+        cumulative = 0
+        for index, count in enumerate(counts):
+            cumulative += count
+            if cumulative >= target and count:
+                return self.buckets[index] if index < len(self.buckets) else math.inf
+        return 0.0
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', f'{bound:g}'),))} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {self.sums[key]:g}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+    def snapshot(self) -> list[dict]:
+        return [
+            {
+                "labels": dict(key),
+                "count": sum(counts),
+                "sum": self.sums[key],
+                "p50": self.quantile(key, 0.5),
+                "p99": self.quantile(key, 0.99),
+            }
+            for key, counts in self.counts.items()
+        ]
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: dict[str, Counter | Gauge | Histogram] = {}
+
+    def _get_or_create(self, cls, name: str, help: str, **kwargs):
+        if name not in self.metrics:
+            self.metrics[name] = cls(name, help, **kwargs)
+        return self.metrics[name]
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._get_or_create(Counter, name, help)
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self._get_or_create(Gauge, name, help)
+
+    def histogram(self, name: str, help: str, buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, buckets=buckets)
+
+    def render_prometheus(self) -> str:
+        """Текстовый формат экспозиции Prometheus."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        return {
+            name: {"type": metric.kind, "values": metric.snapshot()}
+            for name, metric in self.metrics.items()
+        }
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter("antidtfplus_http_requests_total", "HTTP-запросы к API DTF по эндпоинту, статусу и аккаунту")
+HTTP_LATENCY = registry.histogram("antidtfplus_http_request_seconds", "Длительность HTTP-запросов к API DTF")
+COMMENTS_DELETED = registry.counter("antidtfplus_comments_deleted_total", "Удаленные комментарии")
+REPLIES_SENT = registry.counter("antidtfplus_replies_sent_total", "Отправленные ответы Plus-пользователям")
+COMMENT_FAILURES = registry.counter("antidtfplus_comment_failures_total", "Ошибки обработки комментариев по этапу")
+TOKEN_REFRESHES = registry.counter("antidtfplus_token_refreshes_total", "Обновления токенов по результату")
+WEBSOCKET_CONNECTS = registry.counter("antidtfplus_websocket_connects_total", "Установленные WebSocket-соединения")
+WEBSOCKET_DISCONNECTS = registry.counter("antidtfplus_websocket_disconnects_total", "Разрывы WebSocket-соединения")
+WATCHER_EVENTS = registry.counter("antidtfplus_watcher_events_total", "События упоминаний по исходу (received/coalesced/dropped)")
+WATCHER_QUEUE_DEPTH = registry.gauge("antidtfplus_watcher_queue_depth", "Постов в очереди наблюдателя")
+EVENT_TO_ACTION = registry.histogram("antidtfplus_event_to_action_seconds", "Время от упоминания до окончания его обработки")
+POLLER_POLLS = registry.counter("antidtfplus_poller_polls_total", "Опросы ленты ActivityPoller (hot - новые посты, full - вся лента)")
+POLLER_INTERVAL = registry.gauge("antidtfplus_poller_interval_seconds", "Текущий интервал опроса ленты")
+
+async def _handle_metrics_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        # Заголовки запроса не нужны, но их надо дочитать
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, body = "200 OK", registry.render_prometheus().encode()
+        else:
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+async def start_metrics_server(port: int, host: str = "127.0.0.1") -> asyncio.AbstractServer:
+    """Запускает HTTP-эндпоинт /metrics в формате Prometheus (по умолчанию только на localhost)."""
+    server = await asyncio.start_server(_handle_metrics_request, host, port)
+    logger.info(f"📈 Метрики доступны на http://{host}:{port}/metrics")
+    return server
+
+def write_snapshot(path: str, previous: dict | None = None) -> dict:
+    """
+    Атомарно записывает JSON-снимок метрик. Для счетчиков добавляет темп в минуту
+    относительно предыдущего снимка, в том числе отдельно по каждому аккаунту.
+    Возвращает данные для следующего вызова.
+    """
+    now = time.time()
+    counters = {name: metric for name, metric in registry.metrics.items() if isinstance(metric, Counter)}
+    totals = {name: metric.total() for name, metric in counters.items()}
+    account_totals = {f"{name}|{account}": total for name, metric in counters.items() for account, total in metric.totals_by("account").items()}
+    per_minute, per_account = {}, defaultdict(dict)
+    if previous and now > previous["timestamp"]:
+        elapsed_minutes = (now - previous["timestamp"]) / 60
+        per_minute = {name: (total - previous["totals"].get(name, 0.0)) / elapsed_minutes for name, total in totals.items()}
+        for key, total in account_totals.items():
+            name, account = key.split("|", 1)
+            per_account[account][name] = (total - previous["account_totals"].get(key, 0.0)) / elapsed_minutes
+
+    data = {"timestamp": now, "per_minute": per_minute, "per_minute_by_account": per_account, "metrics": registry.snapshot()}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, default=str)
+    os.replace(tmp_path, path)
+    return {"timestamp": now, "totals": totals, "account_totals": account_totals}
+
+async def snapshot_loop(interval: float, path: str = METRICS_SNAPSHOT_FILE) -> None:
+    """Периодически сохраняет JSON-снимок метрик в файл."""
+    previous = None
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            previous = write_snapshot(path, previous)
+        except OSError as e:
+            logger.warning(f"⚠️ Не удалось сохранить снимок метрик: {e}")
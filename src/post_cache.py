@@ -0,0 +1,85 @@
+import json
+import logging
+import os
+import time
+
+from .dtf_api import PostSummary
+
+logger = logging.getLogger(__name__)
+
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".antidtfplus")
+POST_CACHE_DIR = os.path.join(APP_DATA_DIR, "post_cache")
+
+class PostCache:
+    """
+    Лента пользователя на диске: компактные сводки постов (ID, заголовок, дата, число комментариев), от новых к старым.
+    Список постов в GUI показывается из кэша сразу, а с API догружаются только посты новее уже известных.
+    Удаленные посты пропадают из кэша только после полной синхронизации (retain).
+    Не потокобезопасен: вызывается только из потока Tk.
+    """
+
+    def __init__(self, subsite_id: int, directory: str = POST_CACHE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.subsite_id = subsite_id
+        self.path = os.path.join(directory, f"{subsite_id}.json")
+        self.posts: list[PostSummary] = []
+        self.synced_at: float | None = None  # Время последней полной синхронизации
+        self._by_id: dict[int, PostSummary] = {}
+
+    def load(self) -> list[PostSummary]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            posts = [PostSummary(*row) for row in data["posts"]]
+        except FileNotFoundError:
+            return self.posts
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"⚠️ Не удалось прочитать кэш постов: {e}")
+            return self.posts
+        self.synced_at = data.get("synced_at")
+        self._set_posts(posts)
+        return self.posts
+
+    def __contains__(self, post_id: int) -> bool:
+        return post_id in self._by_id
+
+    def merge(self, posts: list[PostSummary]) -> int:
+        """Добавляет новые посты и обновляет известные (заголовок, число комментариев). Возвращает число новых."""
+        added = 0
+        for post in posts:
+            known = self._by_id.get(post.id)
+            if known is None:
+                self._by_id[post.id] = post
+                added += 1
+            else:
+                known.title, known.date, known.comments = post.title, post.date, post.comments
+        if added:
+            self._set_posts(self._by_id.values())
+        return added
+
+    def retain(self, post_ids: set[int]) -> int:
+        """После полной синхронизации убирает посты, которых больше нет в ленте. Возвращает число удаленных."""
+        removed = len(self._by_id) - len(post_ids & self._by_id.keys())
+        if removed:
+            self._set_posts(post for post in self.posts if post.id in post_ids)
+        self.synced_at = time.time()
+        return removed
+
+    def _set_posts(self, posts) -> None:
+        self.posts = sorted(posts, key=lambda post: (post.date or 0, post.id), reverse=True)
+        self._by_id = {post.id: post for post in self.posts}
+
+    def save(self) -> None:
+        """Атомарно сохраняет кэш (строки [id, title, date, comments] - без ключей, чтобы файл был компактным)."""
+        data = {
+            "subsite_id": self.subsite_id,
+            "synced_at": self.synced_at,
+            "posts": [[post.id, post.title, post.date, post.comments] for post in self.posts],
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"⚠️ Не удалось сохранить кэш постов: {e}")
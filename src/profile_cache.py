@@ -0,0 +1,34 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".antidtfplus")
+PROFILE_CACHE_FILE = os.path.join(APP_DATA_DIR, "profile_cache.json")
+
+# Только то, что нужно службе для подключения к WebSocket без обращения к API
+PROFILE_FIELDS = ("id", "name", "userHash")
+
+def load_profile(path: str = PROFILE_CACHE_FILE) -> dict | None:
+    """Профиль пользователя, сохраненный при последнем успешном get_user_info (GUI или службой)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"⚠️ Не удалось прочитать кэш профиля: {e}")
+        return None
+    return profile if isinstance(profile, dict) and profile.get("userHash") else None
+
+def save_profile(user_data: dict, path: str = PROFILE_CACHE_FILE) -> None:
+    """Атомарно сохраняет профиль, если он изменился."""
+    profile = {name: user_data.get(name) for name in PROFILE_FIELDS}
+    if not profile["userHash"] or load_profile(path) == profile:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
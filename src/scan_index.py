@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import threading
+import time
+
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".antidtfplus")
+SCAN_INDEX_FILE = os.path.join(APP_DATA_DIR, "scan_index.sqlite3")
+
+class ScanIndex:
+    """
+    Локальный индекс уже проверенных комментариев (SQLite).
+    Для каждого поста хранит наибольший ID и дату проверенного комментария, а также ID комментариев,
+    по которым уже были выполнены действия. Повторные проверки поста смотрят только на новые комментарии.
+    Для Plus-комментариев, которые не удалось удалить, помнит, что автору уже ответили и сколько раз
+    удаление не удалось: повторные проверки не отвечают повторно и в конце концов перестают пытаться.
+    Файл открывается в режиме WAL, чтобы GUI и фоновая служба могли работать с ним одновременно.
+    """
+
+    def __init__(self, path: str = SCAN_INDEX_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        # GUI обращается к индексу из разных потоков, поэтому доступ сериализуем сами
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS posts ("
+                " post_id INTEGER PRIMARY KEY,"
+                " last_comment_id INTEGER NOT NULL,"
+                " last_comment_date INTEGER,"
+                " scanned_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS acted_comments ("
+                " comment_id INTEGER PRIMARY KEY,"
+                " post_id INTEGER NOT NULL,"
+                " acted_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS acted_comments_post ON acted_comments (post_id)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS replied_comments ("
+                " comment_id INTEGER PRIMARY KEY,"
+                " post_id INTEGER NOT NULL,"
+                " replied_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS failed_deletes ("
+                " comment_id INTEGER PRIMARY KEY,"
+                " post_id INTEGER NOT NULL,"
+                " failures INTEGER NOT NULL,"
+                " failed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS failed_deletes_post ON failed_deletes (post_id)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS post_activity ("
+                " post_id INTEGER PRIMARY KEY,"
+                " comment_count INTEGER NOT NULL,"
+                " checked_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks ("
+                " name TEXT PRIMARY KEY,"
+                " value REAL NOT NULL)"
+            )
+
+    def last_comment_id(self, post_id: int) -> int:
+        """Наибольший ID комментария, до которого пост уже полностью проверен (0, если пост не проверялся)."""
+        with self._lock:
+            row = self._conn.execute("SELECT last_comment_id FROM posts WHERE post_id = ?", (post_id,)).fetchone()
+        return row[0] if row else 0
+
+    def acted_comment_ids(self, post_id: int) -> set[int]:
+        """ID комментариев поста, по которым уже были выполнены действия."""
+        with self._lock:
+            rows = self._conn.execute("SELECT comment_id FROM acted_comments WHERE post_id = ?", (post_id,)).fetchall()
+        return {row[0] for row in rows}
+
+    def mark_acted(self, post_id: int, comment_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO acted_comments (comment_id, post_id, acted_at) VALUES (?, ?, ?)",
+                (comment_id, post_id, time.time()),
+            )
+
+    def was_replied(self, comment_id: int) -> bool:
+        """Автору комментария уже отправлен ответ (в этом или одном из прошлых проходов)."""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM replied_comments WHERE comment_id = ?", (comment_id,)).fetchone()
+        return row is not None
+
+    def mark_replied(self, post_id: int, comment_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO replied_comments (comment_id, post_id, replied_at) VALUES (?, ?, ?)",
+                (comment_id, post_id, time.time()),
+            )
+
+    def record_delete_failure(self, post_id: int, comment_id: int) -> int:
+        """Отмечает неудачную попытку удаления. Возвращает, сколько попыток удалить комментарий уже не удалось."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO failed_deletes (comment_id, post_id, failures, failed_at) VALUES (?, ?, 1, ?)"
+                " ON CONFLICT (comment_id) DO UPDATE SET failures = failures + 1, failed_at = excluded.failed_at",
+                (comment_id, post_id, time.time()),
+            )
+            row = self._conn.execute("SELECT failures FROM failed_deletes WHERE comment_id = ?", (comment_id,)).fetchone()
+        return row[0]
+
+    def abandoned_comment_ids(self, post_id: int, max_failures: int) -> set[int]:
+        """ID комментариев поста, которые не удалось удалить max_failures раз: больше их не трогаем."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT comment_id FROM failed_deletes WHERE post_id = ? AND failures >= ?", (post_id, max_failures),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def record_scan(self, post_id: int, last_comment_id: int, last_comment_date: int | None) -> None:
+        """Сдвигает отметку проверки поста вперед (назад она никогда не откатывается)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO posts (post_id, last_comment_id, last_comment_date, scanned_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (post_id) DO UPDATE SET"
+                " last_comment_id = MAX(last_comment_id, excluded.last_comment_id),"
+                " last_comment_date = COALESCE(MAX(last_comment_date, excluded.last_comment_date), last_comment_date, excluded.last_comment_date),"
+                " scanned_at = excluded.scanned_at",
+                (post_id, last_comment_id, last_comment_date, time.time()),
+            )
+
+    def comment_counts(self, post_ids) -> dict[int, int]:
+        """Число комментариев постов по ленте на момент последней проверки (постов, которых нет в индексе, нет и в ответе)."""
+        post_ids = list(post_ids)
+        if not post_ids:
+            return {}
+        placeholders = ",".join("?" * len(post_ids))
+        with self._lock:
+            rows = self._conn.execute(f"SELECT post_id, comment_count FROM post_activity WHERE post_id IN ({placeholders})", post_ids).fetchall()
+        return dict(rows)
+
+    def record_comment_counts(self, counts: dict[int, int]) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO post_activity (post_id, comment_count, checked_at) VALUES (?, ?, ?)",
+                [(post_id, count, now) for post_id, count in counts.items()],
+            )
+
+    def watermark(self, name: str) -> float | None:
+        """Сохраненная отметка времени (например, когда watcher последний раз точно получал события)."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM watermarks WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, name: str, value: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO watermarks (name, value) VALUES (?, ?)", (name, value))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,32 @@
+import contextlib
+import time
+
+class StartupProfile:
+    """
+    Замер холодного старта службы (--profile-startup): интервалы этапов относительно запуска процесса.
+    Этапы могут идти параллельно, поэтому для каждого печатается и начало, и длительность.
+    """
+
+    def __init__(self, started_at: float | None = None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.spans: list[tuple[str, float, float]] = []
+        self.reported = False
+
+    def add(self, name: str, start: float, end: float | None = None) -> None:
+        self.spans.append((name, start, end if end is not None else time.perf_counter()))
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start)
+
+    def report(self, title: str = "Watcher на связи") -> str:
+        self.reported = True
+        total = time.perf_counter() - self.started_at
+        lines = [f"⏱️ Профиль запуска: {title} через {total * 1000:.0f} мс", f"{'Этап':<40}{'начало, мс':>12}{'длит., мс':>12}"]
+        for name, start, end in sorted(self.spans, key=lambda span: span[1]):
+            lines.append(f"{name:<40}{(start - self.started_at) * 1000:>12.0f}{(end - start) * 1000:>12.0f}")
+        return "\n".join(lines)
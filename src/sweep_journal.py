@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".antidtfplus")
+SWEEP_JOURNAL_FILE = os.path.join(APP_DATA_DIR, "sweep_journal.jsonl")
+
+@dataclass
+class JournalState:
+    """Состояние незавершенной очистки, восстановленное из журнала."""
+    subsite_id: int
+    started_at: float
+    done_posts: set[int] = field(default_factory=set)
+    replied: set[int] = field(default_factory=set)  # Комментарии, на которые ответ уже отправлялся (или мог уйти)
+    pending_deletes: dict[int, int] = field(default_factory=dict)  # comment_id -> post_id: удаление начато, итог неизвестен
+
+class SweepJournal:
+    """
+    Журнал очистки всех постов (JSON Lines, только дозапись).
+    Записи: start, post_done, action (reply/delete: issued -> done/failed) и finish.
+    Если процесс оборвался до finish (или очистку отменили), следующий запуск в режиме resume
+    сначала повторяет удаления с неизвестным итогом (pending_deletes), затем пропускает завершенные посты
+    и не отвечает повторно тем, кому ответ уже мог уйти.
+    Повторное удаление безопасно: 404 на удаление считается успехом (см. delete_comment).
+    """
+
+    def __init__(self, path: str = SWEEP_JOURNAL_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.state: JournalState | None = None
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _read_unfinished(self) -> JournalState | None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return None
+
+        state = None
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Последняя строка могла не дописаться при аварийном завершении
+            match record.get("event"):
+                case "start":
+                    state = JournalState(record["subsite_id"], record["ts"])
+                case "finish":
+                    state = None
+                case "post_done" if state:
+                    state.done_posts.add(record["post_id"])
+                case "action" if state:
+                    comment_id = record["comment_id"]
+                    if record["action"] == "reply":
+                        if record["status"] == "failed":
+                            state.replied.discard(comment_id)
+                        else:
+                            state.replied.add(comment_id)
+                    elif record["status"] == "issued":
+                        state.pending_deletes[comment_id] = record["post_id"]
+                    else:
+                        state.pending_deletes.pop(comment_id, None)
+        return state
+
+    def unfinished_run(self, subsite_id: int) -> JournalState | None:
+        """Незавершенная очистка для subsite_id, если она есть в журнале."""
+        with self._lock:
+            state = self._read_unfinished()
+        return state if state and state.subsite_id == subsite_id else None
+
+    def begin(self, subsite_id: int, resume: bool = False) -> JournalState:
+        """
+        Начинает запись очистки. При resume=True продолжает незавершенную очистку того же подсайта,
+        иначе журнал начинается заново.
+        """
+        with self._lock:
+            state = self._read_unfinished() if resume else None
+            if state and state.subsite_id == subsite_id:
+                self._file = open(self.path, "a", encoding="utf-8")
+                self._append({"event": "resume"})
+                logger.info(f"📒 Продолжаю прерванную очистку: завершено постов {len(state.done_posts)}, "
+                            f"незавершенных удалений {len(state.pending_deletes)}.")
+            else:
+                state = JournalState(subsite_id, time.time())
+                self._file = open(self.path, "w", encoding="utf-8")
+                self._append({"event": "start", "subsite_id": subsite_id})
+            self.state = state
+        return state
+
+    def _append(self, record: dict) -> None:
+        record["ts"] = time.time()
+        # flush после каждой записи: при падении процесса строка уже у ОС
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def is_post_done(self, post_id: int) -> bool:
+        return self.state is not None and post_id in self.state.done_posts
+
+    def was_replied(self, comment_id: int) -> bool:
+        return self.state is not None and comment_id in self.state.replied
+
+    def post_done(self, post_id: int) -> None:
+        with self._lock:
+            self.state.done_posts.add(post_id)
+            self._append({"event": "post_done", "post_id": post_id})
+
+    def action(self, action: str, post_id: int, comment_id: int, status: str) -> None:
+        """Записывает этап действия над комментарием: action - 'reply'/'delete', status - 'issued'/'done'/'failed'."""
+        with self._lock:
+            if action == "reply":
+                if status == "failed":
+                    self.state.replied.discard(comment_id)
+                else:
+                    self.state.replied.add(comment_id)
+            elif status == "issued":
+                self.state.pending_deletes[comment_id] = post_id
+            else:
+                self.state.pending_deletes.pop(comment_id, None)
+            self._append({"event": "action", "action": action, "post_id": post_id, "comment_id": comment_id, "status": status})
+
+    def finish(self) -> None:
+        """Отмечает очистку завершенной: продолжать больше нечего."""
+        with self._lock:
+            self._append({"event": "finish"})
+            self.state = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,159 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+REPLACE_RETRIES = 5  # На Windows os.replace может упасть, пока другой процесс держит файл открытым на чтение
+
+class FileLock:
+    """
+    Межпроцессная блокировка на отдельном файле (.lock): fcntl.flock на POSIX, msvcrt.locking на Windows.
+    Внутри процесса дополнительно сериализует потоки.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd: int | None = None
+
+    def acquire(self) -> None:
+        self._thread_lock.acquire()
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.name == "nt":
+                while True:
+                    try:
+                        # LK_LOCK сам ждет ~10 секунд, после чего бросает OSError - тогда ждем дальше
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            self._fd = fd
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def release(self) -> None:
+        fd, self._fd = self._fd, None
+        try:
+            if os.name == "nt":
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        finally:
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    @contextlib.asynccontextmanager
+    async def hold(self):
+        """Асинхронный вариант: ожидание блокировки не останавливает event loop."""
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self.acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # Поток все равно дождется блокировки - отпускаем ее сразу, как только он ее получит
+            acquiring.add_done_callback(lambda done: done.exception() is None and self.release())
+            raise
+        try:
+            yield self
+        finally:
+            self.release()
+
+class TokenStore:
+    """
+    Файл кэша токенов, общий для GUI и фоновой службы.
+    - Запись атомарная (временный файл + os.replace), под межпроцессной блокировкой, и только если токены изменились.
+    - Чтение кэшируется в памяти: файл перечитывается, только если изменились его mtime или размер.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.lock = FileLock(f"{path}.lock")
+        self._stat_key: tuple[int, int] | None = None
+        self._tokens: tuple[str | None, str | None] = (None, None)
+
+    def _current_stat_key(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed_on_disk(self) -> bool:
+        """Изменился ли файл с момента последнего чтения или записи этим процессом (один вызов stat)."""
+        return self._current_stat_key() != self._stat_key
+
+    def load(self) -> tuple[str | None, str | None]:
+        """Возвращает (accessToken, refreshToken); файл читается только при изменении."""
+        stat_key = self._current_stat_key()
+        if stat_key is None or stat_key == self._stat_key:
+            return self._tokens
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                tokens = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("⚠️ TokenStore: Не удалось прочитать кэш токенов: %s", e)
+            return self._tokens
+        self._stat_key = stat_key
+        self._tokens = (tokens.get("accessToken"), tokens.get("refreshToken"))
+        return self._tokens
+
+    @property
+    def tokens(self) -> tuple[str | None, str | None]:
+        """Токены на момент последнего чтения или записи этим процессом (без обращения к диску)."""
+        return self._tokens
+
+    def save(self, access_token: str | None, refresh_token: str | None, already_locked: bool = False) -> bool:
+        """
+        Атомарно записывает токены, если они отличаются от последних прочитанных или записанных.
+        Неизменившиеся токены не пишутся, даже если файл на диске новее: его записал другой процесс.
+        Возвращает True, если файл записан.
+        :param already_locked: Блокировку уже держит вызывающий (см. TokenManager._refresh).
+        """
+        tokens = (access_token, refresh_token)
+        if tokens == self._tokens:
+            return False
+        if already_locked:
+            self._write(tokens)
+        else:
+            with self.lock:
+                self._write(tokens)
+        return True
+
+    def _write(self, tokens: tuple[str | None, str | None]) -> None:
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"accessToken": tokens[0], "refreshToken": tokens[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(REPLACE_RETRIES):
+            try:
+                os.replace(tmp_path, self.path)
+                break
+            except PermissionError:
+                if attempt == REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+        self._tokens = tokens
+        self._stat_key = self._current_stat_key()
@@ -1,8 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import asyncio
-import threading
 from ..dtf_api import TokenManager, get_user_info
+from ..profile_cache import save_profile
 
 class AuthWindow(tk.Frame):
     def __init__(self, parent, controller):
@@ -67,54 +66,60 @@ class AuthWindow(tk.Frame):
             messagebox.showerror("Ошибка", "Email и пароль не могут быть пустыми.")
             return
 
-        # Запускаем асинхронную функцию в отдельном потоке, чтобы не блокировать GUI
-        threading.Thread(target=self._async_login, args=(email, password), daemon=True).start()
+        # Запускаем вход в общем фоновом event loop, чтобы не блокировать GUI
+        self.controller.run_async(self._login(email, password), self._on_login_done)
 
     def login_with_refresh_token(self):
         token = self.refresh_token_entry.get()
         if not token:
             messagebox.showerror("Ошибка", "refreshToken не может быть пустым.")
             return
-        # Запускаем асинхронную функцию в отдельном потоке
-        threading.Thread(target=self._async_refresh, args=(token,), daemon=True).start()
-
-    def _async_login(self, email, password):
-        async def task():
-            # Используем token_manager из controller'а
-            self.controller.token_manager.email = email
-            self.controller.token_manager.password = password
-            success = await self.controller.token_manager.login()
-            if success:
-                # После успешного входа получаем user_id
-                user_data = await get_user_info(self.controller.token_manager)
-                if user_data and 'id' in user_data:
-                    self.controller.user_id = user_data['id']
-                    self.controller.show_frame("MainMenu")
-                else:
-                    messagebox.showerror("Ошибка", "Не удалось получить информацию о пользователе после входа.")
-            else:
-                messagebox.showerror("Ошибка входа", "Не удалось войти. Проверьте email, пароль и консоль на наличие ошибок.")
-        
-        asyncio.run(task())
-
-    def _async_refresh(self, token):
-        async def task():
-            # Используем token_manager из controller'а и устанавливаем токен из поля ввода
-            self.controller.token_manager.refresh_token = token
-            await self.controller.token_manager.refresh()
-            
-            if self.controller.token_manager.access_token:
-                # После успешного обновления получаем user_id
-                user_data = await get_user_info(self.controller.token_manager)
-                if user_data and 'id' in user_data:
-                    self.controller.user_id = user_data['id']
-                    self.controller.user_name = user_data.get('name', 'Неизвестный пользователь')
-                    # Сохраняем токен в кэш для будущих авто-входов
-                    self.controller.token_manager._save_tokens_to_cache()
-                    self.controller.show_frame("MainMenu")
-                else:
-                    messagebox.showerror("Ошибка", "Не удалось получить информацию о пользователе после обновления токена.")
-            else:
-                messagebox.showerror("Ошибка входа", "Не удалось войти по refreshToken. Токен недействителен или истек.")
-
-        asyncio.run(task())
\ No newline at end of file
+        self.controller.run_async(self._refresh(token), self._on_refresh_done)
+
+    async def _login(self, email, password):
+        """Входит по логину и паролю. Возвращает данные пользователя ({} если их не удалось получить) или None."""
+        # Используем token_manager из controller'а
+        token_manager = self.controller.token_manager
+        token_manager.email = email
+        token_manager.password = password
+        if not await token_manager.login():
+            return None
+        # После успешного входа получаем user_id
+        return await get_user_info(token_manager) or {}
+
+    async def _refresh(self, token):
+        """Входит по refreshToken. Возвращает данные пользователя ({} если их не удалось получить) или None."""
+        # Используем token_manager из controller'а и устанавливаем токен из поля ввода
+        token_manager = self.controller.token_manager
+        token_manager.refresh_token = token
+        await token_manager.refresh()
+        if not token_manager.access_token:
+            return None
+        # После успешного обновления получаем user_id
+        user_data = await get_user_info(token_manager) or {}
+        if 'id' in user_data:
+            # Сохраняем токен в кэш для будущих авто-входов
+            token_manager._save_tokens_to_cache()
+        return user_data
+
+    def _on_login_done(self, user_data):
+        if user_data is None:
+            messagebox.showerror("Ошибка входа", "Не удалось войти. Проверьте email, пароль и консоль на наличие ошибок.")
+            return
+        self._finish_login(user_data, "Не удалось получить информацию о пользователе после входа.")
+
+    def _on_refresh_done(self, user_data):
+        if user_data is None:
+            messagebox.showerror("Ошибка входа", "Не удалось войти по refreshToken. Токен недействителен или истек.")
+            return
+        self._finish_login(user_data, "Не удалось получить информацию о пользователе после обновления токена.")
+
+    def _finish_login(self, user_data, error_text):
+        if 'id' in user_data:
+            self.controller.user_id = user_data['id']
+            self.controller.user_name = user_data.get('name', 'Неизвестный пользователь')
+            # Служба возьмет userHash из кэша и подключится к WebSocket, не дожидаясь API
+            save_profile(user_data)
+            self.controller.show_frame("MainMenu")
+        else:
+            messagebox.showerror("Ошибка", error_text)
@@ -0,0 +1,92 @@
+import tkinter as tk
+from tkinter import ttk
+from ..job_scheduler import JOB_CANCELLED, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, CleanupJob, JobScheduler
+
+_STATUS_TEXT = {
+    JOB_QUEUED: "⏳ В очереди",
+    JOB_RUNNING: "🔄 Очистка",
+    JOB_DONE: "✅ Готово",
+    JOB_FAILED: "❌ Ошибка",
+    JOB_CANCELLED: "⏹️ Отменено",
+}
+
+class JobPanel(ttk.Frame):
+    """
+    Состояние задач JobScheduler: по строке на пост со статусом и числом удаленных комментариев.
+    report() - обработчик JobScheduler.on_update: вызывается в фоновом event loop и лишь передает
+    копию задачи в поток Tk через after().
+    """
+
+    def __init__(self, parent, scheduler: JobScheduler, height: int = 6):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self._jobs: dict[int, CleanupJob] = {}  # ID поста -> последнее известное состояние задачи
+
+        self.summary_label = ttk.Label(self, text="")
+        self.summary_label.pack(fill="x", padx=5, pady=(5, 0))
+
+        table_frame = tk.Frame(self)
+        table_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        self.tree = ttk.Treeview(table_frame, columns=("status", "deleted", "failed"), height=height)
+        self.tree.heading("#0", text="Пост")
+        self.tree.heading("status", text="Статус")
+        self.tree.heading("deleted", text="Удалено")
+        self.tree.heading("failed", text="Ошибок")
+        self.tree.column("status", width=110, stretch=False)
+        self.tree.column("deleted", width=70, stretch=False, anchor="e")
+        self.tree.column("failed", width=70, stretch=False, anchor="e")
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.config(yscrollcommand=scrollbar.set)
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(fill="x", padx=5, pady=(0, 5))
+        ttk.Button(button_frame, text="Отменить выбранные", command=self.cancel_selected).pack(side="left")
+        ttk.Button(button_frame, text="Отменить все", command=lambda: self.scheduler.cancel()).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Убрать завершенные", command=self.clear_finished).pack(side="left")
+        self._update_summary()
+
+    def report(self, job: CleanupJob):
+        try:
+            self.after(0, self._show_job, job)
+        except (RuntimeError, tk.TclError):
+            pass  # Окно уже закрыто
+
+    def _show_job(self, job: CleanupJob):
+        self._jobs[job.post_id] = job
+        item = str(job.post_id)
+        values = (_STATUS_TEXT.get(job.status, job.status), job.deleted, job.failed)
+        if self.tree.exists(item):
+            self.tree.item(item, values=values)
+        else:
+            self.tree.insert("", "end", iid=item, text=job.title, values=values)
+        if job.error:
+            self.tree.item(item, text=f"{job.title} ({job.error})")
+        self._update_summary()
+
+    def _update_summary(self):
+        counts = {status: 0 for status in _STATUS_TEXT}
+        deleted = 0
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+            deleted += job.deleted
+        if not self._jobs:
+            self.summary_label.config(text="Задач очистки нет.")
+            return
+        self.summary_label.config(text=(
+            f"Очищается: {counts[JOB_RUNNING]}, в очереди: {counts[JOB_QUEUED]}, готово: {counts[JOB_DONE]}, "
+            f"с ошибками: {counts[JOB_FAILED]}, отменено: {counts[JOB_CANCELLED]}. Удалено комментариев: {deleted}"
+        ))
+
+    def cancel_selected(self):
+        post_ids = {int(item) for item in self.tree.selection()}
+        if post_ids:
+            self.scheduler.cancel(post_ids)
+
+    def clear_finished(self):
+        for post_id, job in list(self._jobs.items()):
+            if not job.active:
+                del self._jobs[post_id]
+                self.tree.delete(str(post_id))
+        self._update_summary()
@@ -5,6 +5,7 @@ import sys
 import subprocess
 import ctypes  # <-- Добавьте этот импорт
 from ..dtf_api import find_and_delete_plus_users_comments
+from .progress_panel import ProgressPanel
 
 class MainMenu(tk.Frame):
     def __init__(self, parent, controller):
@@ -35,6 +36,9 @@ class MainMenu(tk.Frame):
                                    command=lambda: controller.show_frame("AuthWindow"))
         button_logout.pack(pady=10)
 
+        self.progress_panel = ProgressPanel(self)
+        self.progress_panel.pack(fill="x", padx=20, pady=10)
+
         self.bind("<<ShowFrame>>", self.on_show_frame)
 
     def on_show_frame(self, event):
@@ -42,13 +46,34 @@ class MainMenu(tk.Frame):
         user_name = self.controller.user_name or "Пользователь"
         self.welcome_label.config(text=f"Приветствую, {user_name}!")
 
-    async def are_you_sure(self):
-        if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить все комментарии от пользователей с подпиской DTF Plus ПОД ВСЕМИ ВАШИМИ ПОСТАМИ??? Это действие необратимо!"):
-            plus_comments_deleted = await find_and_delete_plus_users_comments('all_posts', None, self.controller.user_id, self.controller.token_manager)
-            messagebox.showinfo("Успех", f"Программа успешно удалила {plus_comments_deleted} комментариев под всеми вашими постами!")
+    def are_you_sure(self):
+        if self.progress_panel.running:
+            messagebox.showwarning("Внимание", "Очистка уже идет. Дождитесь ее окончания или нажмите «Отмена».")
+            return
+        unfinished = self.controller.sweep_journal.unfinished_run(self.controller.user_id)
+        if unfinished and messagebox.askyesno(
+            "Незавершенная очистка",
+            f"Прошлая очистка всех постов не была завершена (обработано постов: {len(unfinished.done_posts)}).\n\n"
+            "Продолжить с того места, где она остановилась?"
+        ):
+            self._start_sweep(resume=True)
+        elif messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить все комментарии от пользователей с подпиской DTF Plus ПОД ВСЕМИ ВАШИМИ ПОСТАМИ??? Это действие необратимо!"):
+            self._start_sweep(resume=False)
         else:
             messagebox.showinfo("Отмена", "Удаление комментариев отменено.")
 
+    def _start_sweep(self, resume: bool):
+        cancel_token = self.progress_panel.start("Продолжаю прерванную очистку..." if resume else "Загружаю список постов...")
+        self.controller.run_async(
+            find_and_delete_plus_users_comments(
+                'all_posts', None, self.controller.user_id, self.controller.token_manager,
+                scan_index=self.controller.scan_index, on_progress=self.progress_panel.report, cancel_token=cancel_token,
+                journal=self.controller.sweep_journal, resume=resume,
+            ),
+            self.progress_panel.finish,
+            lambda error: self.progress_panel.finish(None, error),
+        )
+
     def is_admin(self):
         """Проверяет, запущено ли приложение с правами администратора."""
         try:
@@ -0,0 +1,309 @@
+import time
+import tkinter as tk
+from array import array
+from bisect import bisect_right
+from tkinter import ttk
+
+from ..dtf_api import PostSummary
+
+class PostTable:
+    """
+    Посты в компактном виде для списка в GUI: числовые столбцы - в array, заголовки для поиска - в одной строке.
+    Поиск и сортировка возвращают массивы номеров строк, сами сводки постов не копируются.
+    """
+
+    def __init__(self, posts: list[PostSummary]):
+        self.posts = posts
+        self.ids = array('q', (post.id for post in posts))
+        self.dates = array('q', (post.date or 0 for post in posts))
+        self.comments = array('q', (post.comments or 0 for post in posts))
+        # Поисковый индекс: заголовки в нижнем регистре через "\n" в одной строке. str.find ищет подстроку
+        # (и префикс слова) на скорости C, а номер поста по найденному смещению дает bisect по началам заголовков
+        titles = [post.title.casefold() for post in posts]
+        self._haystack = "\n".join(titles)
+        self._starts = array('q')
+        offset = 0
+        for title in titles:
+            self._starts.append(offset)
+            offset += len(title) + 1
+
+    def __len__(self) -> int:
+        return len(self.posts)
+
+    def search(self, query: str) -> array | None:
+        """Номера постов, в заголовке которых есть query (без учета регистра); None - пустой запрос, подходят все."""
+        query = query.strip().casefold()
+        if not query:
+            return None
+        rows = array('q')
+        if "\n" in query:
+            return rows
+        haystack, starts = self._haystack, self._starts
+        position = haystack.find(query)
+        while position != -1:
+            row = bisect_right(starts, position) - 1
+            rows.append(row)
+            # Остальные вхождения в этом же заголовке не нужны - продолжаем со следующего
+            next_row = row + 1
+            if next_row >= len(starts):
+                break
+            position = haystack.find(query, starts[next_row])
+        return rows
+
+    def ordered(self, rows: array | None, column: str, descending: bool) -> array:
+        """Номера строк rows (None - все), отсортированные по столбцу 'date' или 'comments'."""
+        values = self.dates if column == "date" else self.comments
+        ids = self.ids
+        rows = range(len(self.posts)) if rows is None else rows
+        return array('q', sorted(rows, key=lambda row: (values[row], ids[row]), reverse=descending))
+
+class PostListView(ttk.Frame):
+    """
+    Виртуализированный список постов со столбцами «Заголовок», «Дата» и «Комментарии».
+    Canvas рисует только видимые строки (набор элементов переиспользуется при прокрутке), поэтому
+    список из десятков тысяч постов прокручивается, фильтруется и сортируется без задержек.
+    Выделение множественное (Ctrl - добавить/убрать пост, Shift - диапазон, Ctrl+A - все показанные),
+    хранится по ID постов и переживает фильтр, сортировку и обновление списка.
+    """
+    ROW_HEIGHT = 22
+    DATE_WIDTH = 90
+    COMMENTS_WIDTH = 100
+    SELECTED_BACKGROUND = "#cce3ff"
+
+    def __init__(self, parent, on_activate=None):
+        """:param on_activate: Вызывается с PostSummary при двойном щелчке или Enter."""
+        super().__init__(parent)
+        self.on_activate = on_activate
+        self.table = PostTable([])
+        self._rows = array('q')  # Номера строк table в порядке показа (после фильтра и сортировки)
+        self._query = ""
+        self._sort_column, self._sort_descending = "date", True
+        self._top = 0  # Номер первой видимой строки в _rows
+        self._selected_ids: set[int] = set()
+        self._cursor_id: int | None = None  # Пост, с которым работает клавиатура и двойной щелчок
+        self._anchor_id: int | None = None  # Начало диапазона для Shift
+        self._slots: list[tuple[int, int, int, int, int]] = []  # Элементы canvas одной строки: фон, заголовок, маска, дата, комментарии
+        self._placeholder = ""
+
+        header = ttk.Frame(self)
+        header.pack(fill="x")
+        ttk.Label(header, text="Заголовок").pack(side="left", padx=6)
+        self._sort_buttons = {}
+        for column, text, width in (("comments", "Комментарии", 12), ("date", "Дата", 10)):
+            button = ttk.Button(header, text=text, width=width, command=lambda column=column: self.sort_by(column))
+            button.pack(side="right")
+            self._sort_buttons[column] = (button, text)
+
+        body = ttk.Frame(self)
+        body.pack(fill="both", expand=True)
+        self.canvas = tk.Canvas(body, background="white", highlightthickness=1, takefocus=1)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ttk.Scrollbar(body, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self._placeholder_item = self.canvas.create_text(10, 10, anchor="nw", text="", fill="gray40")
+
+        self.canvas.bind("<Configure>", lambda event: self._redraw())
+        self.canvas.bind("<Button-1>", lambda event: self._on_click(event, "single"))
+        self.canvas.bind("<Control-Button-1>", lambda event: self._on_click(event, "toggle"))
+        self.canvas.bind("<Shift-Button-1>", lambda event: self._on_click(event, "range"))
+        self.canvas.bind("<Control-a>", lambda event: self.select_all())
+        self.canvas.bind("<Double-Button-1>", lambda event: self._activate())
+        self.canvas.bind("<Return>", lambda event: self._activate())
+        self.canvas.bind("<MouseWheel>", lambda event: self._scroll_rows(-3 if event.delta > 0 else 3))
+        self.canvas.bind("<Button-4>", lambda event: self._scroll_rows(-3))
+        self.canvas.bind("<Button-5>", lambda event: self._scroll_rows(3))
+        for key, step in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"), ("<Next>", "page"), ("<Home>", "home"), ("<End>", "end")):
+            self.canvas.bind(key, lambda event, step=step: self._move_cursor(step, extend=False))
+            self.canvas.bind(key.replace("<", "<Shift-"), lambda event, step=step: self._move_cursor(step, extend=True))
+        self._update_sort_buttons()
+
+    # --- данные ---
+
+    def set_posts(self, posts: list[PostSummary]):
+        """Заменяет данные списка, сохраняя фильтр, сортировку, выделение и положение прокрутки."""
+        self._placeholder = ""
+        self.table = PostTable(posts)
+        self._apply()
+
+    def set_placeholder(self, text: str):
+        """Показывает служебную надпись вместо постов (загрузка, ошибка)."""
+        self.table = PostTable([])
+        self._placeholder = text
+        self._apply()
+
+    def set_filter(self, query: str):
+        self._query = query
+        self._top = 0
+        self._apply()
+
+    def sort_by(self, column: str):
+        """Сортирует по столбцу; повторный выбор того же столбца меняет направление."""
+        if column == self._sort_column:
+            self._sort_descending = not self._sort_descending
+        else:
+            self._sort_column, self._sort_descending = column, True
+        self._update_sort_buttons()
+        self._apply()
+
+    def selected_posts(self) -> list[PostSummary]:
+        """Выделенные посты из показанных сейчас (скрытые фильтром не входят), в порядке списка."""
+        if not self._selected_ids:
+            return []
+        posts, ids, selected = self.table.posts, self.table.ids, self._selected_ids
+        return [posts[row] for row in self._rows if ids[row] in selected]
+
+    def select_all(self):
+        self._selected_ids = {self.table.ids[row] for row in self._rows}
+        self._redraw()
+
+    @property
+    def shown_count(self) -> int:
+        return len(self._rows)
+
+    def _apply(self):
+        rows = self.table.search(self._query)
+        self._rows = self.table.ordered(rows, self._sort_column, self._sort_descending)
+        self._redraw()
+
+    def _update_sort_buttons(self):
+        for column, (button, text) in self._sort_buttons.items():
+            arrow = (" ▼" if self._sort_descending else " ▲") if column == self._sort_column else ""
+            button.config(text=text + arrow)
+
+    def _position_of(self, post_id: int | None) -> int | None:
+        """Номер поста в _rows (None, если его нет или он скрыт фильтром)."""
+        if post_id is None:
+            return None
+        ids = self.table.ids
+        for index, row in enumerate(self._rows):
+            if ids[row] == post_id:
+                return index
+        return None
+
+    # --- отрисовка ---
+
+    def _full_rows(self) -> int:
+        """Сколько строк помещается целиком."""
+        return max(1, self.canvas.winfo_height() // self.ROW_HEIGHT)
+
+    def _visible_count(self) -> int:
+        return self._full_rows() + 1  # Плюс частично видимая строка внизу
+
+    def _redraw(self):
+        canvas = self.canvas
+        width = canvas.winfo_width()
+        visible = self._visible_count()
+        self._top = max(0, min(self._top, len(self._rows) - self._full_rows()))
+
+        while len(self._slots) < visible:
+            self._slots.append((
+                canvas.create_rectangle(0, 0, 0, 0, width=0),
+                canvas.create_text(0, 0, anchor="w"),
+                canvas.create_rectangle(0, 0, 0, 0, width=0),
+                canvas.create_text(0, 0, anchor="w"),
+                canvas.create_text(0, 0, anchor="e"),
+            ))
+        while len(self._slots) > visible:
+            for item in self._slots.pop():
+                canvas.delete(item)
+
+        posts, ids, selected = self.table.posts, self.table.ids, self._selected_ids
+        date_x = width - self.COMMENTS_WIDTH - self.DATE_WIDTH
+        for index, (background, title, mask, date, comments) in enumerate(self._slots):
+            position = self._top + index
+            if position >= len(self._rows):
+                for item in (background, title, mask, date, comments):
+                    canvas.itemconfigure(item, state="hidden")
+                continue
+            row = self._rows[position]
+            post = posts[row]
+            y = index * self.ROW_HEIGHT
+            middle = y + self.ROW_HEIGHT // 2
+            fill = self.SELECTED_BACKGROUND if ids[row] in selected else ("white" if position % 2 == 0 else "#f5f5f5")
+            canvas.coords(background, 0, y, width, y + self.ROW_HEIGHT)
+            canvas.itemconfigure(background, fill=fill, state="normal")
+            canvas.coords(title, 6, middle)
+            canvas.itemconfigure(title, text=post.title, state="normal")
+            # Маска цвета строки закрывает хвост длинного заголовка под столбцами даты и комментариев
+            canvas.coords(mask, date_x - 6, y, width, y + self.ROW_HEIGHT)
+            canvas.itemconfigure(mask, fill=fill, state="normal")
+            canvas.coords(date, date_x, middle)
+            canvas.itemconfigure(date, text=time.strftime("%d.%m.%Y", time.localtime(post.date)) if post.date else "", state="normal")
+            canvas.coords(comments, width - 10, middle)
+            canvas.itemconfigure(comments, text="" if post.comments is None else str(post.comments), state="normal")
+
+        canvas.itemconfigure(self._placeholder_item, text=self._placeholder or ("Ничего не найдено." if self._query and not self._rows else ""))
+        canvas.tag_raise(self._placeholder_item)
+        total = len(self._rows)
+        if total:
+            self.scrollbar.set(self._top / total, min(1.0, (self._top + self._full_rows()) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    # --- прокрутка и выделение ---
+
+    def _scroll_rows(self, delta: int):
+        self._top += delta
+        self._redraw()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self._top = int(float(value) * len(self._rows))
+        elif action == "scroll":
+            step = self._full_rows() if unit == "pages" else 1
+            self._top += int(value) * step
+        self._redraw()
+
+    def _on_click(self, event, mode: str):
+        """mode: 'single' - выделить только этот пост, 'toggle' - добавить/убрать его, 'range' - диапазон от якоря."""
+        self.canvas.focus_set()
+        position = self._top + event.y // self.ROW_HEIGHT
+        if position < len(self._rows):
+            self._select(position, mode)
+            self._redraw()
+
+    def _select(self, position: int, mode: str):
+        post_id = self.table.ids[self._rows[position]]
+        self._cursor_id = post_id
+        match mode:
+            case "toggle":
+                self._selected_ids ^= {post_id}
+                self._anchor_id = post_id
+            case "range":
+                anchor = self._position_of(self._anchor_id)
+                if anchor is None:
+                    anchor, self._anchor_id = position, post_id
+                first, last = sorted((anchor, position))
+                ids = self.table.ids
+                self._selected_ids = {ids[row] for row in self._rows[first:last + 1]}
+            case _:
+                self._selected_ids = {post_id}
+                self._anchor_id = post_id
+
+    def _move_cursor(self, step, extend: bool):
+        if not self._rows:
+            return
+        current = self._position_of(self._cursor_id)
+        page = self._full_rows()
+        match step:
+            case "home":
+                position = 0
+            case "end":
+                position = len(self._rows) - 1
+            case "page" | "-page":
+                position = (current if current is not None else self._top) + (page if step == "page" else -page)
+            case _:
+                position = self._top if current is None else current + step
+        position = max(0, min(position, len(self._rows) - 1))
+        self._select(position, "range" if extend else "single")
+        # Строка курсора должна оставаться видимой
+        if position < self._top:
+            self._top = position
+        elif position >= self._top + page:
+            self._top = position - page + 1
+        self._redraw()
+
+    def _activate(self):
+        position = self._position_of(self._cursor_id)
+        if position is not None and self.on_activate:
+            self.on_activate(self.table.posts[self._rows[position]])
@@ -1,37 +1,51 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
-import asyncio
-from ..dtf_api import get_subsite_posts, find_and_delete_plus_users_comments
+from ..dtf_api import PostSummary, iter_subsite_posts
+from ..post_cache import PostCache
+from .job_panel import JobPanel
+from .post_list import PostListView
 
 class PostSelectionMenu(tk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
-        self.posts = [] # Будем хранить здесь полный список постов
+        self.post_cache: PostCache | None = None # Кэш ленты текущего пользователя на диске
+        self._load_generation = 0 # Номер текущей загрузки, чтобы отбрасывать страницы от устаревших загрузок
+        self._load_future = None # Текущая загрузка в фоновом event loop
 
         label = tk.Label(self, text="Выбор поста для очистки", font=controller.title_font)
         label.pack(side="top", fill="x", pady=10)
 
-        # Фрейм для списка и скроллбара
-        list_frame = tk.Frame(self)
-        list_frame.pack(pady=10, padx=20, fill="both", expand=True)
+        # Поиск по заголовку: список фильтруется по мере ввода
+        search_frame = tk.Frame(self)
+        search_frame.pack(padx=20, fill="x")
+        ttk.Label(search_frame, text="Поиск:").pack(side="left")
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self._on_search())
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.pack(side="left", fill="x", expand=True, padx=(5, 0))
+        self.found_label = ttk.Label(search_frame, text="")
+        self.found_label.pack(side="left", padx=(5, 0))
 
-        self.posts_listbox = tk.Listbox(list_frame)
-        self.posts_listbox.pack(side="left", fill="both", expand=True)
-
-        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.posts_listbox.yview)
-        scrollbar.pack(side="right", fill="y")
-        self.posts_listbox.config(yscrollcommand=scrollbar.set)
+        self.post_list = PostListView(self, on_activate=lambda post: self.confirm_delete([post]))
+        self.post_list.pack(pady=10, padx=20, fill="both", expand=True)
 
         # Фрейм для кнопок
         button_frame = tk.Frame(self)
         button_frame.pack(pady=10, padx=20, fill="x")
 
-        button_delete = ttk.Button(button_frame, text="Удалить Plus-комментарии в выбранном посте",
+        self.job_panel = JobPanel(self, controller.job_scheduler)
+        self.job_panel.pack(fill="x", padx=20, pady=(0, 10), before=button_frame)
+        controller.job_scheduler.on_update = self.job_panel.report
+
+        button_delete = ttk.Button(button_frame, text="Удалить Plus-комментарии в выбранных постах",
                                    command=self.confirm_delete_for_selected)
         button_delete.pack(side="left", expand=True, padx=5)
 
+        button_resync = ttk.Button(button_frame, text="Обновить список полностью",
+                                   command=lambda: self.load_posts(full=True))
+        button_resync.pack(side="left", expand=True, padx=5)
+
         button_back = ttk.Button(button_frame, text="Назад в меню",
                                  command=lambda: controller.show_frame("MainMenu"))
         button_back.pack(side="right", expand=True, padx=5)
@@ -43,58 +57,111 @@ class PostSelectionMenu(tk.Frame):
         """Событие, которое вызывается, когда окно становится видимым."""
         self.load_posts()
 
-    def load_posts(self):
-        """Запускает асинхронную загрузку постов в отдельном потоке."""
-        self.posts_listbox.delete(0, tk.END)
-        self.posts_listbox.insert(tk.END, "Загрузка постов...")
-        threading.Thread(target=self._async_load_posts, daemon=True).start()
-
-    def _async_load_posts(self):
-        """Асинхронная функция для получения и отображения постов."""
-        async def task():
-            if not self.controller.user_id:
-                messagebox.showerror("Ошибка", "ID пользователя не найден. Невозможно загрузить посты.")
-                self.posts_listbox.delete(0, tk.END)
-                self.posts_listbox.insert(tk.END, "Ошибка: ID пользователя не найден.")
-                return
-
-            self.posts = await get_subsite_posts(self.controller.user_id, self.controller.token_manager)
-            
-            self.posts_listbox.delete(0, tk.END) # Очищаем список
-            if not self.posts:
-                self.posts_listbox.insert(tk.END, "Посты не найдены.")
-            else:
-                for post in self.posts:
-                    # Убедимся, что у поста есть поле 'data'
-                    title = post.get('data', {}).get('title', 'Пост без заголовка')
-                    self.posts_listbox.insert(tk.END, title)
-        
-        asyncio.run(task())
-
-    def confirm_delete_for_selected(self):
-        """Подтверждает и запускает удаление комментариев для выбранного поста."""
-        selected_indices = self.posts_listbox.curselection()
-        if not selected_indices:
-            messagebox.showwarning("Внимание", "Пожалуйста, выберите пост из списка.")
+    @property
+    def posts(self) -> list[PostSummary]:
+        return self.post_cache.posts if self.post_cache else []
+
+    def load_posts(self, full=False):
+        """
+        Показывает посты из кэша и догружает в общем фоновом event loop только новые (full=True - всю ленту заново),
+        отменяя предыдущую загрузку, если она еще идет.
+        """
+        self._load_generation += 1
+        if self._load_future is not None:
+            self._load_future.cancel()
+        if not self.controller.user_id:
+            messagebox.showerror("Ошибка", "ID пользователя не найден. Невозможно загрузить посты.")
+            self.post_cache = None
+            self._show_placeholder(self._load_generation, "Ошибка: ID пользователя не найден.")
             return
-        
-        selected_index = selected_indices[0]
-        selected_post = self.posts[selected_index].get('data', {})
-        post_id = selected_post.get('id')
-        post_title = selected_post.get('title', 'Пост без заголовка')
-
-        if not post_id:
-            messagebox.showerror("Ошибка", "Не удалось получить ID для выбранного поста.")
+        if self.post_cache is None or self.post_cache.subsite_id != self.controller.user_id:
+            self.post_cache = PostCache(self.controller.user_id)
+            self.post_cache.load()
+        if self.posts:
+            self._render_posts()
+        else:
+            self.post_list.set_placeholder("Загрузка постов...")
+        generation = self._load_generation
+        known_ids = {post.id for post in self.posts}
+        self._load_future = self.controller.run_async(
+            self._load_posts(generation, full, known_ids),
+            lambda seen_ids: self._finish_loading(generation, full, seen_ids),
+        )
+
+    async def _load_posts(self, generation, full, known_ids):
+        """
+        Получает посты постранично и передает страницы в поток Tk по мере загрузки.
+        Без full останавливается на первой странице, где есть уже известный пост: дальше лента уже в кэше.
+        Возвращает ID всех полученных постов.
+        """
+        seen_ids = set()
+        async for page in iter_subsite_posts(self.controller.user_id, self.controller.token_manager, strict=full):
+            posts = [post for post in map(PostSummary.from_api, page) if post]
+            seen_ids.update(post.id for post in posts)
+            self.after(0, self._merge_posts, generation, posts)
+            if not full and any(post.id in known_ids for post in posts):
+                break
+        return seen_ids
+
+    def _merge_posts(self, generation, posts):
+        """Добавляет страницу постов в кэш и в список (вызывается в потоке Tk)."""
+        if generation != self._load_generation:
             return
+        self.post_cache.merge(posts)
+        # Список виртуализирован: пересборка компактной таблицы дешевая, выделение и прокрутка сохраняются
+        self._render_posts()
+
+    def _render_posts(self):
+        self.post_list.set_posts(self.posts)
+        self._update_found_label()
 
-        if messagebox.askyesno("Подтверждение", f"Вы уверены, что хотите удалить все комментарии от пользователей с DTF Plus под постом «{post_title}»?"):
-            threading.Thread(target=self._async_delete_comments, args=(post_id,), daemon=True).start()
+    def _on_search(self):
+        self.post_list.set_filter(self.search_var.get())
+        self._update_found_label()
 
-    def _async_delete_comments(self, post_id):
-        """Асинхронная функция для удаления комментариев."""
-        async def task():
-            messagebox.showinfo("В процессе", "Начинаю удаление комментариев. Это может занять некоторое время...")
-            deleted_count = await find_and_delete_plus_users_comments('one_post', post_id, self.controller.user_id, self.controller.token_manager)
-            messagebox.showinfo("Успех", f"Удалено {deleted_count} комментариев.")
+    def _update_found_label(self):
+        query = self.search_var.get().strip()
+        self.found_label.config(text=f"найдено {self.post_list.shown_count} из {len(self.posts)}" if query else "")
 
-        asyncio.run(task())
\ No newline at end of file
+    def _finish_loading(self, generation, full, seen_ids):
+        if generation != self._load_generation:
+            return
+        if full and self.post_cache.retain(seen_ids):
+            self._render_posts()
+        self.post_cache.save()
+        if not self.posts:
+            self._show_placeholder(generation, "Посты не найдены.")
+
+    def _show_placeholder(self, generation, text):
+        if generation != self._load_generation:
+            return
+        self.post_list.set_placeholder(text)
+
+    def confirm_delete_for_selected(self):
+        """Подтверждает и ставит в очередь очистки все выбранные посты (Ctrl/Shift - выбрать несколько)."""
+        posts = self.post_list.selected_posts()
+        if not posts:
+            messagebox.showwarning("Внимание", "Пожалуйста, выберите посты из списка.")
+            return
+        self.confirm_delete(posts)
+
+    def confirm_delete(self, posts: list[PostSummary]):
+        """
+        Одно подтверждение на весь пакет, затем посты очищаются параллельно в JobScheduler.
+        Посты, которые уже стоят в очереди или очищаются, повторно не добавляются.
+        """
+        if len(posts) == 1:
+            question = f"под постом «{posts[0].title}»"
+        else:
+            question = f"под выбранными постами ({len(posts)})"
+        if not messagebox.askyesno("Подтверждение", f"Вы уверены, что хотите удалить все комментарии от пользователей с DTF Plus {question}?"):
+            return
+        self.controller.run_async(
+            self.controller.job_scheduler.submit(posts),
+            lambda jobs: self._on_jobs_submitted(len(posts), jobs),
+        )
+
+    def _on_jobs_submitted(self, requested, jobs):
+        skipped = requested - len(jobs)
+        if skipped:
+            messagebox.showinfo("Очистка", f"Уже очищаются или ждут в очереди: {skipped}. Добавлено новых задач: {len(jobs)}.")
@@ -0,0 +1,83 @@
+import tkinter as tk
+from tkinter import ttk
+from ..dtf_api import CancellationToken, SweepProgress, SweepResult
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes} мин {seconds} с" if minutes else f"{seconds} с"
+
+class ProgressPanel(ttk.Frame):
+    """
+    Полоса прогресса очистки с кнопкой «Отмена».
+    report() - async-обработчик прогресса для find_and_delete_plus_users_comments: вызывается в фоновом
+    event loop и лишь передает снимок в поток Tk через after().
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.cancel_token: CancellationToken | None = None
+
+        self.status_label = ttk.Label(self, text="", wraplength=500, justify="left")
+        self.status_label.pack(fill="x", padx=5, pady=(5, 0))
+
+        bar_frame = tk.Frame(self)
+        bar_frame.pack(fill="x", padx=5, pady=5)
+        self.progress_bar = ttk.Progressbar(bar_frame, mode="determinate")
+        self.progress_bar.pack(side="left", fill="x", expand=True)
+        self.cancel_button = ttk.Button(bar_frame, text="Отмена", command=self.cancel, state="disabled")
+        self.cancel_button.pack(side="left", padx=(5, 0))
+
+    @property
+    def running(self) -> bool:
+        return self.cancel_token is not None
+
+    def start(self, text: str) -> CancellationToken:
+        """Готовит панель к новой очистке и возвращает токен отмены для нее."""
+        self.cancel_token = CancellationToken()
+        self.progress_bar.config(mode="indeterminate", value=0)
+        self.progress_bar.start(15)
+        self.cancel_button.config(state="normal")
+        self.status_label.config(text=text)
+        return self.cancel_token
+
+    def cancel(self):
+        if self.cancel_token:
+            self.cancel_token.cancel()
+            self.cancel_button.config(state="disabled")
+            self.status_label.config(text="Останавливаю: дожидаюсь уже начатых запросов...")
+
+    async def report(self, progress: SweepProgress):
+        try:
+            self.after(0, self._show_progress, progress)
+        except (RuntimeError, tk.TclError):
+            pass  # Окно уже закрыто
+
+    def _show_progress(self, progress: SweepProgress):
+        if not self.running or progress.finished:
+            return
+        if progress.posts_found:
+            self.progress_bar.stop()
+            self.progress_bar.config(mode="determinate", maximum=progress.posts_found, value=progress.posts_scanned)
+        text = (f"Постов: {progress.posts_scanned}/{progress.posts_found}{'' if progress.feed_complete else '+'}, "
+                f"проверено комментариев: {progress.comments_inspected}, удалено: {progress.deleted}, ошибок: {progress.failed}")
+        if progress.eta is not None:
+            text += f", осталось ~{_format_duration(progress.eta)}"
+        if not self.cancel_token.cancelled:
+            self.status_label.config(text=text)
+
+    def finish(self, result: SweepResult | None, error: BaseException | None = None):
+        """Показывает итог очистки вместо модального окна."""
+        self.cancel_token = None
+        self.progress_bar.stop()
+        self.cancel_button.config(state="disabled")
+        if error is not None:
+            self.progress_bar.config(mode="determinate", value=0)
+            self.status_label.config(text=f"❌ Ошибка: {error}")
+            return
+        self.progress_bar.config(mode="determinate", maximum=max(len(result.posts), 1), value=len(result.posts))
+        text = f"{'⏹️ Остановлено' if result.cancelled else '✅ Готово'}: удалено {result.deleted} комментариев"
+        if result.failed:
+            text += f", не удалось удалить: {result.failed}"
+        if result.failed_posts:
+            text += f". Постов с ошибками: {len(result.failed_posts)} ({result.failed_posts[0].error})"
+        self.status_label.config(text=text + ".")